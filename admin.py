@@ -1,13 +1,36 @@
+import os
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 
-from algorithm import generate_exam_schedule, persist_schedule_to_db
+from algorithme import (
+    decompose_schedule,
+    exact_schedule,
+    generate_exam_schedule,
+    current_schedule,
+    kept_modules,
+    load_current_assignments,
+    load_problem,
+    optimise_schedule,
+    persist_schedule_to_db,
+    repair_schedule,
+    room_efficiency,
+    schedule_cost,
+    schedule_quality,
+    solve_schedule
+)
+from multistart import run_multistart
+from validator import validate_schedule
 from db_queries import (
     count_examens,
     count_salles,
     count_conflicts,
     count_salles_utilisees,
-    exams_per_day
+    taux_remplissage_salles,
+    exams_per_day,
+    list_creneaux,
+    list_salles
 )
 
 # ================== PAGE CONFIG (TOUJOURS EN PREMIER) ==================
@@ -92,6 +115,7 @@ with col3:
     <div class="card">
         <h3>🏫 Salles</h3>
         <div class="kpi">{used} / {total}</div>
+        <p>Remplissage : {taux_remplissage_salles():.0%}</p>
     </div>
     """, unsafe_allow_html=True)
 
@@ -108,29 +132,171 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.subheader("🚀 Génération automatique")
 
+MOTEURS = {
+    "Glouton (ordre des modules)": "greedy",
+    "DSatur (coloration de graphe)": "dsatur",
+    "Plus grand degré d'abord": "largest_degree",
+}
+moteur = st.selectbox("🧠 Moteur de planification", list(MOTEURS))
+
+OPTIMISEURS = {
+    "Recuit simulé": "anneal",
+    "Recherche tabou": "tabu",
+}
+optimiseur = st.selectbox("🔧 Optimisation", list(OPTIMISEURS))
+budget = st.slider("⏱ Budget d'optimisation (secondes, 0 = aucune)", 0, 120, 30)
+departs = st.number_input("🔁 Départs en parallèle (cœurs CPU)", min_value=1, max_value=os.cpu_count() or 1, value=1)
+
+reprendre = st.checkbox("♻️ Partir du planning actuel (ne déplacer que les examens à revoir)", value=False)
+exact = st.checkbox("🎯 Résolution exacte (MILP, HiGHS) — petits départements", value=False)
+limite_exacte = st.number_input("⏱ Limite du solveur exact (secondes)", min_value=5, max_value=600, value=30)
+decomposer = st.checkbox(
+    "🧩 Résoudre les groupes de modules indépendants en parallèle (puis optimiser)",
+    value=False,
+    disabled=exact or departs > 1,
+    help="Sans effet avec la résolution exacte ou plusieurs départs"
+)
+
 auto_save = st.checkbox("💾 Enregistrer automatiquement en base", value=True)
 
 if st.button("⚙️ Générer l’emploi du temps"):
     try:
-        planning = generate_exam_schedule()
+        problem = load_problem()
+        charge = problem["load_stats"]
+        st.caption(
+            f"📥 {charge['inscriptions']} inscriptions chargées en {charge['total_load_seconds']:.2f} s "
+            f"— {charge['memory_bytes'] / 1e6:.1f} Mo en mémoire"
+        )
+        actuel = load_current_assignments() if reprendre else None
+        if exact:
+            planning, stats = exact_schedule(problem, time_limit=limite_exacte, mode=MOTEURS[moteur],
+                                             initial=actuel)
+            ecart = f"{stats['gap']:.1%}" if stats["gap"] is not None else "inconnu"
+            st.info(
+                f"Solveur exact ({stats['status']}) : objectif {stats['objective']} "
+                f"contre {stats['incumbent']} pour l'heuristique, écart à l'optimum {ecart} — "
+                f"planning retenu : {'MILP' if stats['used'] == 'milp' else 'heuristique'}"
+            )
+        elif departs > 1:
+            planning, stats = run_multistart(
+                problem,
+                partial(solve_schedule, mode=MOTEURS[moteur], method=OPTIMISEURS[optimiseur], initial=actuel),
+                schedule_cost,
+                runs=departs,
+                budget=budget
+            )
+            st.info(
+                f"{stats['runs']} départs : meilleur coût {stats['best_score']} "
+                f"(graine {stats['best_seed']}), pire {stats['worst_score']}"
+            )
+        else:
+            if decomposer:
+                planning, stats = decompose_schedule(problem, mode=MOTEURS[moteur], initial=actuel)
+                st.info(
+                    f"{stats['components']} composantes indépendantes "
+                    f"(la plus grande : {stats['largest_component']} modules) en {stats['parts']} parties, "
+                    f"{stats['contested']} salle(s) disputée(s), "
+                    f"{stats['recovered']} module(s) sur {stats['retried']} replacé(s) à la fusion"
+                )
+                if stats["fallback"]:
+                    st.caption("Résolution d'un seul tenant retenue : elle place plus de modules")
+            else:
+                planning = generate_exam_schedule(problem, mode=MOTEURS[moteur], initial=actuel)
+            if budget > 0:
+                # le coût (conflits, non placés, étalement) ne descend pas sous 0
+                if schedule_cost(problem, planning) == 0:
+                    st.info("Aucun conflit, tout est placé et bien étalé : optimisation inutile")
+                else:
+                    planning, stats = optimise_schedule(
+                        planning, problem, method=OPTIMISEURS[optimiseur], budget=budget,
+                        keep=kept_modules(planning, actuel) if actuel else ()
+                    )
+                    st.info(
+                        f"Optimisation : coût {stats['initial_cost']} → {stats['best_cost']} "
+                        f"en {stats['elapsed']:.1f} s ({stats['iterations']} itérations)"
+                    )
+        if actuel:
+            st.caption(f"♻️ {len(kept_modules(planning, actuel))} examen(s) sur {len(actuel)} "
+                       f"gardent leur créneau actuel")
         df = pd.DataFrame(planning)
 
         if df.empty:
             st.warning("Aucun examen généré")
         else:
             st.success("Emploi du temps généré avec succès")
+            qualite = schedule_quality(planning, problem)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("🏫 Remplissage des salles", f"{room_efficiency(planning, problem):.0%}")
+            col2.metric("🗓 Créneaux utilisés", qualite["used"], f"borne inférieure {qualite['bound']}",
+                        delta_color="off")
+            if qualite["gap"] is None:
+                col3.metric("📉 Non placés", qualite["unplaced"])
+            else:
+                col3.metric("📉 Écart à la borne", qualite["gap"])
+            if qualite["grid_too_small"]:
+                st.warning(
+                    f"Il faut au moins {qualite['bound']} créneaux (clique de {qualite['clique']} modules, "
+                    f"{qualite['seats']} d'après les places, {qualite['rooms']} d'après les salles) "
+                    f"pour {qualite['creneaux']} disponibles : la grille est trop petite"
+                )
+            elif qualite["optimal"]:
+                st.caption("✅ Nombre de créneaux minimal atteint")
 
             st.dataframe(df[["module", "salle", "date", "heure"]], use_container_width=True)
 
             if auto_save:
-                persist_schedule_to_db(planning)
-                st.success("Emploi du temps enregistré en base")
+                violations = validate_schedule(planning, problem)
+                if violations:
+                    st.error(f"{len(violations)} contrainte(s) violée(s) : rien n'a été enregistré")
+                    st.dataframe(pd.DataFrame(violations)[["rule", "message"]], use_container_width=True)
+                else:
+                    temps = persist_schedule_to_db(planning)
+                    st.success("Emploi du temps enregistré en base")
+                    st.caption(
+                        f"💾 Écriture en {temps['total']:.2f} s — " + ", ".join(
+                            f"{etape} {duree * 1000:.0f} ms" for etape, duree in temps.items() if etape != "total"
+                        )
+                    )
 
     except Exception as e:
         st.error(f"Erreur : {e}")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+# ================== REPARATION ==================
+st.markdown('<div class="card">', unsafe_allow_html=True)
+st.subheader("🩹 Réparer le planning actuel")
+st.caption("Seuls les examens d'une salle fermée ou d'un créneau annulé sont déplacés")
+
+fermees = st.multiselect("🚪 Salles fermées", list_salles(), format_func=lambda s: f"{s[1]} ({s[2]} places)")
+annules = st.multiselect("❌ Créneaux annulés", list_creneaux(), format_func=lambda c: f"{c[1]} {c[2]} - {c[3]}")
+
+if st.button("🩹 Réparer", disabled=not (fermees or annules)):
+    try:
+        problem = load_problem()
+        planning, diff = repair_schedule(
+            current_schedule(problem, load_current_assignments()),
+            problem,
+            {"closed_salles": [s[0] for s in fermees], "cancelled_creneaux": [c[0] for c in annules]}
+        )
+        violations = validate_schedule(planning, problem)
+        if not diff:
+            st.info("Aucun examen concerné : rien à changer")
+        elif violations:
+            st.error(f"{len(violations)} contrainte(s) violée(s) : rien n'a été enregistré")
+            st.dataframe(pd.DataFrame(violations)[["rule", "message"]], use_container_width=True)
+        else:
+            persist_schedule_to_db(diff, clear_unscheduled=True)
+            st.success(f"{len(diff)} examen(s) déplacé(s) et enregistré(s)")
+            non_places = sum(1 for item in diff if item["id_creneau"] is None)
+            if non_places:
+                st.warning(f"{non_places} examen(s) sans place disponible : retiré(s) du planning")
+            st.dataframe(pd.DataFrame(diff)[["module", "salle", "date", "heure"]], use_container_width=True)
+    except Exception as e:
+        st.error(f"Erreur : {e}")
+
+st.markdown('</div>', unsafe_allow_html=True)
+
 # ================== STATS ==================
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.subheader("📊 Examens par jour")
@@ -150,4 +316,4 @@ if st.button("🚪 Se déconnecter"):
     st.switch_page("pages/login.py")
 
 # ================== FOOTER ==================
-st.caption("Projet universitaire — Génération automatique des examens"
+st.caption("Projet universitaire — Génération automatique des examens")
@@ -1,26 +1,47 @@
+import heapq
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from bd import get_connection
+from bounds import quality_report, slot_lower_bound
+from conflict_graph import build_conflict_graph, connected_components
+from enrollment import Enrollment
+from milp_scheduler import objective, solve_milp
+from optimizer import METHODS, ScheduleState
+from prof_index import MAX_PER_DAY, ProfIndex
+from rooms import RoomIndex, item_salles, utilisation
+from validator import validate_schedule
 
 
-def generate_exam_schedule():
-    """Generate a simple conflict-aware exam schedule.
+INSCRIPTION_FETCH_SIZE = 50000
 
-    Returned schedule items include ids so they can be persisted:
-    {id_module, module, id_salle, salle, id_creneau, date, heure}
+
+def load_problem(conn=None):
+    """Load modules, enrollments, rooms and slots in a single session.
+
+    Inscriptions are streamed through a server-side cursor into a compact
+    CSR Enrollment (module_students) in one pass.
+    Returns {modules, module_students, nb_inscrits, salles, creneaux,
+    module_prof, indisponibilites, load_stats}; nb_inscrits is the
+    trigger-maintained module.nb_inscrits counter and module_prof the professor already
+    responsible for each module's examen, whose day limit and unavailable
+    creneaux the engines respect. The stats give the enrollment's memory
+    footprint and the load times.
     """
-    conn = get_connection()
+    started = time.perf_counter()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cur = conn.cursor()
 
     # modules
-    cur.execute("SELECT id_module, nom FROM module")
-    modules = cur.fetchall()  # list of (id_module, nom)
-
-    # students per module
-    module_students = {}
-    for m in modules:
-        mid = m[0]
-        cur.execute("SELECT id_etud FROM inscription WHERE id_module = %s", (mid,))
-        rows = cur.fetchall()
-        module_students[mid] = set(r[0] for r in rows)
+    cur.execute("SELECT id_module, nom, nb_inscrits FROM module")
+    rows = cur.fetchall()
+    modules = [(mid, nom) for mid, nom, _ in rows]  # list of (id_module, nom)
+    nb_inscrits = {mid: n for mid, _, n in rows}
 
     # salles
     cur.execute("SELECT id_salle, nom, capacite FROM salle")
@@ -30,109 +51,934 @@ def generate_exam_schedule():
     cur.execute("SELECT id_creneau, date_exam, heure_debut, heure_fin FROM creneau ORDER BY date_exam, heure_debut")
     creneaux = cur.fetchall()
 
-    schedule = []
-    used_salle_creneau = set()  # (salle_id, creneau_id)
-    modules_by_creneau = {}  # creneau_id -> list of module_ids scheduled
+    # professors in charge of each module's exam, and their unavailability
+    cur.execute("SELECT id_module, id_prof FROM examen WHERE id_prof IS NOT NULL ORDER BY id_examen")
+    module_prof = {}
+    for mid, pid in cur.fetchall():
+        module_prof.setdefault(mid, pid)
+    cur.execute("SELECT id_prof, id_creneau FROM indisponibilite")
+    indisponibilites = {}
+    for pid, cid in cur.fetchall():
+        indisponibilites.setdefault(pid, []).append(cid)
+    cur.close()
+
+    # students per module, streamed
+    stream = conn.cursor(name="inscription_stream")
+    stream.execute("SELECT id_module, id_etud FROM inscription")
+    module_students = Enrollment.from_cursor(stream, INSCRIPTION_FETCH_SIZE)
+    stream.close()
+
+    if own_conn:
+        conn.close()
+
+    load_stats = module_students.report()
+    load_stats["total_load_seconds"] = time.perf_counter() - started
+    return {
+        "modules": modules,
+        "module_students": module_students,
+        "nb_inscrits": nb_inscrits,
+        "salles": salles,
+        "creneaux": creneaux,
+        "module_prof": module_prof,
+        "indisponibilites": indisponibilites,
+        "load_stats": load_stats,
+    }
+
+
+def load_current_assignments(conn=None):
+    """Placements already in the examen table, as
+    {id_module: (id_creneau, [id_salle, ...])}; split exams list their
+    examen_salle rooms, largest share first.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT e.id_module, e.id_creneau, e.id_salle,
+               array_remove(array_agg(es.id_salle ORDER BY es.nb_places DESC), NULL)
+        FROM examen e
+        LEFT JOIN examen_salle es ON es.id_examen = e.id_examen
+        WHERE e.id_creneau IS NOT NULL AND e.id_salle IS NOT NULL
+        GROUP BY e.id_examen
+        ORDER BY e.id_examen
+    """)
+    current = {}
+    for mid, cid, sid, split in cur.fetchall():
+        current.setdefault(mid, (cid, split or [sid]))
+    cur.close()
+    if own_conn:
+        conn.close()
+    return current
+
+
+def kept_modules(schedule, initial):
+    """Modules of `schedule` still in their `initial` creneau (see load_current_assignments)."""
+    return {
+        item["id_module"] for item in schedule
+        if item.get("id_creneau") is not None
+        and initial.get(item["id_module"], (None,))[0] == item["id_creneau"]
+    }
+
+
+def _size(problem, mid):
+    """Students of module `mid`: module.nb_inscrits when loaded, else the enrollment."""
+    counts = problem.get("nb_inscrits")
+    if counts is not None and mid in counts:
+        return counts[mid]
+    return len(problem["module_students"].get(mid, ()))
+
+
+def _scheduled_item(mid, mnom, salle, creneau, repartition=None):
+    """`repartition` lists (salle, places) when the cohort is split over rooms."""
+    sid, snom, _ = salle
+    cid, date_exam, hd, hf = creneau
+    item = {
+        "id_module": mid,
+        "module": mnom,
+        "id_salle": sid,
+        "salle": snom,
+        "id_creneau": cid,
+        "date": date_exam,
+        "heure": f"{hd} - {hf}"
+    }
+    if repartition:
+        item["salle"] = " + ".join(s[1] for s, _ in repartition)
+        item["repartition"] = [(s[0], places) for s, places in repartition]
+    return item
+
+
+def _unscheduled_item(mid, mnom):
+    return {
+        "id_module": mid,
+        "module": mnom,
+        "id_salle": None,
+        "salle": None,
+        "id_creneau": None,
+        "date": None,
+        "heure": None,
+        "note": "Not scheduled"
+    }
+
+
+def _room_index(salles):
+    """RoomIndex over problem salles, plus id -> salle tuple for the items."""
+    return RoomIndex((s[0], s[2]) for s in salles), {s[0]: s for s in salles}
+
+
+def _take_salles(rooms, salle_by_id, cid, n_students):
+    """Take the best-fit salle at `cid`, or several when no single one is big
+    enough. Returns (salle, repartition or None), or None if nothing fits."""
+    packing = rooms.pack(cid, n_students)
+    if packing is None:
+        return None
+    for sid, _ in packing:
+        rooms.take(cid, sid)
+    repartition = None
+    if len(packing) > 1:
+        repartition = [(salle_by_id[sid], places) for sid, places in packing]
+    return salle_by_id[packing[0][0]], repartition
+
+
+def _staff(problem):
+    """ProfIndex of the professors in charge of exams over the creneau grid
+    (one day per date_exam), with their unavailable creneaux."""
+    creneaux = problem["creneaux"]
+    return ProfIndex(
+        ((pid, None) for pid in sorted(set(problem.get("module_prof", {}).values()))),
+        [c[0] for c in creneaux],
+        days={c[0]: c[1] for c in creneaux},
+        max_per_day=MAX_PER_DAY,
+        unavailable=problem.get("indisponibilites")
+    )
+
+
+def _prof_free(staff, problem, mid, cid):
+    """Whether the professor in charge of `mid` (if any) can take `cid`."""
+    pid = problem.get("module_prof", {}).get(mid)
+    return pid is None or staff.is_free(pid, cid)
+
+
+def _prof_take(staff, problem, mid, cid):
+    pid = problem.get("module_prof", {}).get(mid)
+    if pid is not None:
+        staff.assign(pid, cid)
+
+
+def _day_taken(neighbours, modules_by_day, day):
+    """Whether a module of `neighbours` (modules sharing students) already has
+    its exam on `day`: the examen trigger allows one exam per student per
+    day, so every creneau of that date is closed to the module."""
+    return any(other in neighbours for other in modules_by_day.get(day, ()))
+
+
+def _keep_initial(problem, conflicts, initial):
+    """Items for the `initial` placements ({id_module: (id_creneau, [id_salle])})
+    that are still feasible: known creneau and salles, enough seats, no room
+    taken twice, professor available and no student sitting an earlier
+    kept module the same day.
+    """
+    creneau_by_id = {c[0]: c for c in problem["creneaux"]}
+    rooms, salle_by_id = _room_index(problem["salles"])
+    staff = _staff(problem)
+    modules_by_day = {}
+
+    kept = {}
+    for mid, mnom in problem["modules"]:
+        if mid not in initial:
+            continue
+        cid, sids = initial[mid]
+        c = creneau_by_id.get(cid)
+        if c is None or not sids or len(set(sids)) != len(sids):
+            continue
+        if not all(sid in salle_by_id and rooms.is_free(cid, sid) for sid in sids):
+            continue
+        if not _prof_free(staff, problem, mid, cid):
+            continue
+        if _day_taken(conflicts.get(mid, {}), modules_by_day, c[1]):
+            continue
+
+        repartition, remaining = [], _size(problem, mid)
+        for sid in sids:
+            places = min(rooms.capacity[sid], remaining)
+            repartition.append((salle_by_id[sid], places))
+            remaining -= places
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            continue  # the cohort grew past the rooms it had
+
+        for salle, _ in repartition:
+            rooms.take(cid, salle[0])
+        _prof_take(staff, problem, mid, cid)
+        modules_by_day.setdefault(c[1], []).append(mid)
+        kept[mid] = _scheduled_item(
+            mid, mnom, repartition[0][0], c, repartition if len(repartition) > 1 else None
+        )
+    return kept
+
+
+def _start(problem, kept):
+    """Room and professor indexes with the kept items' salles and professors
+    taken, and kept modules per day."""
+    rooms, salle_by_id = _room_index(problem["salles"])
+    staff = _staff(problem)
+    modules_by_day = {}
+    for mid, item in kept.items():
+        for sid in item_salles(item):
+            rooms.take(item["id_creneau"], sid)
+        _prof_take(staff, problem, mid, item["id_creneau"])
+        modules_by_day.setdefault(item["date"], []).append(mid)
+    return rooms, salle_by_id, staff, modules_by_day
+
+
+def _schedule_first_fit(problem, conflicts, order, kept=None):
+    """Place modules in the given order, each in the first feasible creneau.
+    Modules in `kept` keep their item and are not moved."""
+    creneaux = problem["creneaux"]
 
-    for module in modules:
-        mid, mnom = module[0], module[1]
-        n_students = len(module_students.get(mid, set()))
-        assigned = False
+    placed = dict(kept or {})
+    rooms, salle_by_id, staff, modules_by_day = _start(problem, placed)
+
+    for mid, mnom in order:
+        if mid in placed:
+            continue
+        n_students = _size(problem, mid)
+        placed[mid] = _unscheduled_item(mid, mnom)
 
         for c in creneaux:
-            cid, date_exam, hd, hf = c
-
-            # check student conflicts with modules already at this creneau
-            conflict = False
-            for other_mid in modules_by_creneau.get(cid, []):
-                if module_students.get(other_mid, set()) & module_students.get(mid, set()):
-                    conflict = True
-                    break
-            if conflict:
+            cid = c[0]
+
+            # no student of the module may already sit an exam that day
+            if _day_taken(conflicts.get(mid, {}), modules_by_day, c[1]):
+                continue
+            if not _prof_free(staff, problem, mid, cid):
                 continue
 
-            # try to find a salle with enough capacity and free
-            for salle in salles:
-                sid, snom, cap = salle
-                key = (sid, cid)
-                if key in used_salle_creneau:
-                    continue
-                if cap is not None and n_students > cap:
+            # smallest free salle with enough capacity, or a split
+            taken = _take_salles(rooms, salle_by_id, cid, n_students)
+            if taken is None:
+                continue
+
+            _prof_take(staff, problem, mid, cid)
+            modules_by_day.setdefault(c[1], []).append(mid)
+            placed[mid] = _scheduled_item(mid, mnom, taken[0], c, taken[1])
+            break
+
+    return placed
+
+
+def _rank(problem, rnd):
+    """Tie-break rank per module: table order, or a seeded shuffle of it."""
+    mids = [m[0] for m in problem["modules"]]
+    if rnd is not None:
+        rnd.shuffle(mids)
+    return {mid: i for i, mid in enumerate(mids)}
+
+
+def _engine_greedy(problem, conflicts, rnd=None, kept=None):
+    """Table order, first-fit (the original behaviour); shuffled when seeded."""
+    rank = _rank(problem, rnd)
+    order = sorted(problem["modules"], key=lambda m: rank[m[0]])
+    return _schedule_first_fit(problem, conflicts, order, kept)
+
+
+def _engine_largest_degree(problem, conflicts, rnd=None, kept=None):
+    """Most-conflicting modules first (Welsh-Powell order), first-fit."""
+    rank = _rank(problem, rnd)
+    order = sorted(
+        problem["modules"],
+        key=lambda m: (-len(conflicts.get(m[0], {})), rank[m[0]])
+    )
+    return _schedule_first_fit(problem, conflicts, order, kept)
+
+
+def _engine_dsatur(problem, conflicts, rnd=None, kept=None):
+    """DSatur: always place the module whose neighbours already occupy the
+    most distinct days; ties fall back to largest degree, then table order.
+    Kept modules start out placed and saturate their neighbours.
+    """
+    creneaux = problem["creneaux"]
+
+    names = dict((m[0], m[1]) for m in problem["modules"])
+    rank = _rank(problem, rnd)
+    degree = {mid: len(conflicts.get(mid, {})) for mid in names}
+    blocked = {mid: set() for mid in names}  # days used by placed neighbours
+
+    placed = dict(kept or {})
+    rooms, salle_by_id, staff, modules_by_day = _start(problem, placed)
+    for mid, item in placed.items():
+        for other in conflicts.get(mid, {}):
+            blocked[other].add(item["date"])
+
+    heap = [(-len(blocked[mid]), -degree[mid], rank[mid], mid) for mid in names if mid not in placed]
+    heapq.heapify(heap)
+
+    while heap:
+        neg_sat, _, _, mid = heapq.heappop(heap)
+        if mid in placed or -neg_sat != len(blocked[mid]):
+            continue  # already placed, or a stale saturation entry
+
+        n_students = _size(problem, mid)
+        placed[mid] = _unscheduled_item(mid, names[mid])
+
+        for c in creneaux:
+            cid = c[0]
+            if _day_taken(conflicts.get(mid, {}), modules_by_day, c[1]):
+                continue
+            if not _prof_free(staff, problem, mid, cid):
+                continue
+            taken = _take_salles(rooms, salle_by_id, cid, n_students)
+            if taken is None:
+                continue
+
+            _prof_take(staff, problem, mid, cid)
+            modules_by_day.setdefault(c[1], []).append(mid)
+            placed[mid] = _scheduled_item(mid, names[mid], taken[0], c, taken[1])
+
+            for other in conflicts.get(mid, {}):
+                if other in placed or c[1] in blocked[other]:
                     continue
+                blocked[other].add(c[1])
+                heapq.heappush(heap, (-len(blocked[other]), -degree[other], rank[other], other))
+            break
 
-                # assign
-                used_salle_creneau.add(key)
-                modules_by_creneau.setdefault(cid, []).append(mid)
-
-                schedule.append({
-                    "id_module": mid,
-                    "module": mnom,
-                    "id_salle": sid,
-                    "salle": snom,
-                    "id_creneau": cid,
-                    "date": date_exam,
-                    "heure": f"{hd} - {hf}"
-                })
-                assigned = True
-                break
+    return placed
 
-            if assigned:
-                break
 
-        if not assigned:
-            schedule.append({
-                "id_module": mid,
-                "module": mnom,
-                "id_salle": None,
-                "salle": None,
-                "id_creneau": None,
-                "date": None,
-                "heure": None,
-                "note": "Not scheduled"
-            })
+ENGINES = {
+    "greedy": _engine_greedy,
+    "largest_degree": _engine_largest_degree,
+    "dsatur": _engine_dsatur,
+}
 
-    cur.close()
-    conn.close()
 
+def _conflicts(problem):
+    """Conflict graph with every module present, enrolled or not."""
+    conflicts = build_conflict_graph(problem["module_students"])
+    for m in problem["modules"]:
+        conflicts.setdefault(m[0], {})
+    return conflicts
+
+
+def generate_exam_schedule(problem=None, mode="greedy", seed=None, initial=None):
+    """Generate a conflict-aware exam schedule.
+
+    `problem` is the dict returned by load_problem(); it is loaded when omitted.
+    `mode` selects the engine in ENGINES ("greedy", "largest_degree", "dsatur").
+    A `seed` randomises the engine's tie-breaking order, for multi-start runs.
+    `initial` ({id_module: (id_creneau, [id_salle, ...])}, see
+    load_current_assignments) warm-starts the engine: every placement still
+    feasible is kept and only displaced or new modules are placed.
+    Returned schedule items include ids so they can be persisted:
+    {id_module, module, id_salle, salle, id_creneau, date, heure}
+    """
+    if mode not in ENGINES:
+        raise ValueError(f"Unknown scheduling mode: {mode}")
+    if problem is None:
+        problem = load_problem()
+
+    conflicts = _conflicts(problem)
+    rnd = random.Random(seed) if seed is not None else None
+    kept = _keep_initial(problem, conflicts, initial) if initial else None
+    placed = ENGINES[mode](problem, conflicts, rnd, kept)
+
+    # keep the module table order whatever order the engine placed them in
+    return [placed[m[0]] for m in problem["modules"]]
+
+
+def exact_schedule(problem=None, time_limit=30.0, mode="dsatur", initial=None):
+    """Optimal schedule (or a certified gap) from a MILP solved by HiGHS.
+
+    The `mode` heuristic runs first and is kept as the incumbent: it is
+    returned whenever the solver finds nothing better within `time_limit`
+    seconds. Exams the heuristic split over several rooms stay where they
+    are, as do the placements kept from an `initial` warm start.
+    Returns (schedule, stats).
+    """
+    if problem is None:
+        problem = load_problem()
+
+    salles = {s[0]: s for s in problem["salles"]}
+    creneaux = {c[0]: c for c in problem["creneaux"]}
+    names = dict((m[0], m[1]) for m in problem["modules"])
+
+    incumbent = generate_exam_schedule(problem, mode=mode, initial=initial)
+    keep = kept_modules(incumbent, initial) if initial else set()
+    incumbent_value = objective(
+        sum(1 for item in incumbent if item["id_creneau"] is None),
+        len({item["id_creneau"] for item in incumbent if item["id_creneau"] is not None}),
+        len(creneaux)
+    )
+
+    placements, stats = solve_milp(
+        list(names),
+        {mid: _size(problem, mid) for mid in names},
+        _conflicts(problem),
+        [(s[0], s[2]) for s in problem["salles"]],
+        list(creneaux),
+        time_limit=time_limit,
+        fixed={
+            item["id_module"]: (item["id_creneau"], item_salles(item))
+            for item in incumbent if item.get("repartition") or item["id_module"] in keep
+        },
+        groups=problem.get("module_prof"),
+        days={cid: c[1] for cid, c in creneaux.items()},
+        max_per_day=MAX_PER_DAY,
+        unavailable=problem.get("indisponibilites")
+    )
+    stats["incumbent"] = incumbent_value
+
+    if placements is None or stats["objective"] >= incumbent_value:
+        stats["used"] = "heuristic"
+        return incumbent, stats
+
+    stats["used"] = "milp"
+    schedule = []
+    for item in incumbent:
+        mid = item["id_module"]
+        if item.get("repartition") or mid in keep:
+            schedule.append(item)
+        elif mid in placements:
+            cid, sid = placements[mid]
+            schedule.append(_scheduled_item(mid, names[mid], salles[sid], creneaux[cid]))
+        else:
+            schedule.append(_unscheduled_item(mid, names[mid]))
+    return schedule, stats
+
+
+def _solve_part(args):
+    part, mode, initial = args
+    return generate_exam_schedule(part, mode=mode, initial=initial)
+
+
+def decompose_schedule(problem=None, mode="dsatur", workers=None, initial=None):
+    """Solve independent groups of modules in parallel, then merge.
+
+    Connected components of the conflict graph share no students; those
+    sharing a professor are joined, and the groups are packed into at most
+    `workers` parts balanced by seats needed. Each part is solved by `mode`
+    in its own process over every salle, so the parts only compete for
+    rooms: at the merge, a (creneau, salle) claimed twice goes to the
+    larger cohort and the other module is re-placed, its part's creneau
+    tried first, then its warm-start one, over the salles still free.
+    Modules a part could not place get the same second chance. If some
+    are still left out, the whole problem is also solved in one piece and
+    the merge is only kept when it places as many modules.
+    `initial` warm-starts each part (see generate_exam_schedule).
+    Returns (schedule, stats).
+    """
+    if problem is None:
+        problem = load_problem()
+    workers = workers or os.cpu_count() or 1
+
+    module_students = problem["module_students"]
+    creneaux = problem["creneaux"]
+    module_prof = problem.get("module_prof", {})
+    sizes = {m[0]: _size(problem, m[0]) for m in problem["modules"]}
+    conflicts = _conflicts(problem)
+
+    # modules of one professor stay together: link them like conflicts
+    linked = {mid: dict(others) for mid, others in conflicts.items()}
+    first_of = {}
+    for mid, pid in module_prof.items():
+        if mid not in linked:
+            continue
+        if pid in first_of:
+            linked[mid][first_of[pid]] = 0
+            linked[first_of[pid]][mid] = 0
+        else:
+            first_of[pid] = mid
+    components = connected_components(linked)
+
+    # heaviest component first into the lightest part
+    n_parts = max(1, min(workers, len(components)))
+    parts = [[] for _ in range(n_parts)]
+    loads = [0] * n_parts
+    for component in sorted(components, key=lambda c: -sum(sizes.get(mid, 0) for mid in c)):
+        i = loads.index(min(loads))
+        parts[i].extend(component)
+        loads[i] += sum(sizes.get(mid, 0) for mid in component)
+
+    names = dict((m[0], m[1]) for m in problem["modules"])
+    jobs = []
+    for part in parts:
+        members = set(part)
+        jobs.append(({
+            "modules": [m for m in problem["modules"] if m[0] in members],
+            "module_students": module_students.subset(part),
+            "nb_inscrits": {mid: sizes[mid] for mid in part if mid in sizes},
+            "salles": problem["salles"],
+            "creneaux": creneaux,
+            "module_prof": {mid: pid for mid, pid in module_prof.items() if mid in members},
+            "indisponibilites": problem.get("indisponibilites", {}),
+        }, mode, {mid: p for mid, p in (initial or {}).items() if mid in members} or None))
+
+    if n_parts > 1:
+        with ProcessPoolExecutor(max_workers=n_parts) as pool:
+            results = list(pool.map(_solve_part, jobs))
+    else:
+        results = [_solve_part(jobs[0])]
+
+    # merge: parts own disjoint students and professors, only salles are
+    # contested; the largest cohorts claim theirs first
+    items = sorted(
+        (i for r in results for i in r),
+        key=lambda item: (item["id_creneau"] is None, -sizes.get(item["id_module"], 0), item["id_module"])
+    )
+    placed = {}
+    rooms, salle_by_id = _room_index(problem["salles"])
+    staff = _staff(problem)
+    modules_by_day = {}
+    contested = {}  # id_module -> creneau its part chose
+    for item in items:
+        mid, cid = item["id_module"], item["id_creneau"]
+        if cid is not None and not all(rooms.is_free(cid, sid) for sid in item_salles(item)):
+            contested[mid] = cid
+            placed[mid] = _unscheduled_item(mid, names[mid])
+            continue
+        placed[mid] = item
+        if cid is not None:
+            for sid in item_salles(item):
+                rooms.take(cid, sid)
+            _prof_take(staff, problem, mid, cid)
+            modules_by_day.setdefault(item["date"], []).append(mid)
+
+    # second chance for the modules that lost a salle or that a part left
+    # out, most constrained first, over every salle still free
+    retried = sorted(
+        (mid for mid, item in placed.items() if item["id_creneau"] is None),
+        key=lambda mid: (-len(conflicts.get(mid, {})), mid)
+    )
+    by_id = {c[0]: c for c in creneaux}
+    for mid in retried:
+        neighbours = conflicts.get(mid, {})
+        preferred = [cid for cid in (contested.get(mid), (initial or {}).get(mid, (None,))[0]) if cid in by_id]
+        candidates = [by_id[cid] for cid in dict.fromkeys(preferred)]
+        candidates += [c for c in creneaux if c[0] not in preferred]
+        for c in candidates:
+            cid = c[0]
+            if _day_taken(neighbours, modules_by_day, c[1]):
+                continue
+            if not _prof_free(staff, problem, mid, cid):
+                continue
+            taken = _take_salles(rooms, salle_by_id, cid, sizes.get(mid, 0))
+            if taken is None:
+                continue
+            _prof_take(staff, problem, mid, cid)
+            modules_by_day.setdefault(c[1], []).append(mid)
+            placed[mid] = _scheduled_item(mid, names[mid], taken[0], c, taken[1])
+            break
+
+    schedule = [placed[m[0]] for m in problem["modules"]]
+    unplaced = sum(1 for item in schedule if item["id_creneau"] is None)
+    stats = {
+        "components": len(components),
+        "largest_component": max((len(c) for c in components), default=0),
+        "parts": n_parts,
+        "contested": len(contested),
+        "retried": len(retried),
+        "recovered": len(retried) - unplaced,
+        "fallback": False,
+    }
+
+    # never worse than solving the whole problem at once
+    if unplaced and n_parts > 1:
+        whole = generate_exam_schedule(problem, mode=mode, initial=initial)
+        if sum(1 for item in whole if item["id_creneau"] is None) < unplaced:
+            schedule = whole
+            stats["fallback"] = True
+    return schedule, stats
+
+
+def current_schedule(problem, current):
+    """Schedule items for the `current` placements (see load_current_assignments),
+    as they stand: modules without a placement, or placed in a creneau or
+    salle `problem` does not know, are unscheduled items."""
+    creneau_by_id = {c[0]: c for c in problem["creneaux"]}
+    salle_by_id = {s[0]: s for s in problem["salles"]}
+    schedule = []
+    for mid, mnom in problem["modules"]:
+        cid, sids = current.get(mid, (None, []))
+        if cid not in creneau_by_id or not sids or any(sid not in salle_by_id for sid in sids):
+            schedule.append(_unscheduled_item(mid, mnom))
+            continue
+        repartition, remaining = [], _size(problem, mid)
+        for sid in sids:
+            cap = salle_by_id[sid][2]
+            places = remaining if cap is None else min(cap, remaining)
+            repartition.append((salle_by_id[sid], places))
+            remaining -= places
+        schedule.append(_scheduled_item(
+            mid, mnom, salle_by_id[sids[0]], creneau_by_id[cid], repartition if len(sids) > 1 else None
+        ))
     return schedule
 
 
-def persist_schedule_to_db(schedule, overwrite=True):
-    """Persist generated schedule into examen table.
+def repair_schedule(schedule, problem, changes):
+    """Re-place only the exams a change set touches.
+
+    `changes` may hold "closed_salles" and "cancelled_creneaux" (ids), and
+    "added_inscriptions" / "removed_inscriptions" ((id_module, id_etud)
+    pairs). Exams in a closed salle or cancelled creneau are displaced, as
+    are exams that gained a student now sitting another exam the same day
+    or outgrowing their rooms. Affected exams are found from the
+    students involved, without rebuilding the conflict graph, and every
+    other placement is left untouched. `problem` comes from load_problem()
+    (its module_students is the Enrollment store) and `schedule` typically
+    from current_schedule(); persist the diff with clear_unscheduled=True.
+    Returns (schedule, diff), diff listing only the items that changed.
+    """
+    closed = set(changes.get("closed_salles", ()))
+    cancelled = set(changes.get("cancelled_creneaux", ()))
+    salles = [s for s in problem["salles"] if s[0] not in closed]
+    creneaux = [c for c in problem["creneaux"] if c[0] not in cancelled]
+    enrollment = problem["module_students"]
+
+    added_by_module, added_by_student = {}, {}
+    for mid, etud in changes.get("added_inscriptions", ()):
+        added_by_module.setdefault(mid, set()).add(etud)
+        added_by_student.setdefault(etud, set()).add(mid)
+    removed = set(changes.get("removed_inscriptions", ()))
+
+    def students(mid):
+        ids = set(enrollment.student_ids[enrollment.students(mid)].tolist())
+        ids |= added_by_module.get(mid, set())
+        return {etud for etud in ids if (mid, etud) not in removed}
+
+    def modules_of(etud):
+        i = enrollment.index_of(etud)
+        mids = set(enrollment.modules_of(i).tolist()) if i is not None else set()
+        mids |= added_by_student.get(etud, set())
+        return {mid for mid in mids if (mid, etud) not in removed}
+
+    def neighbours(mid):
+        return {other for etud in students(mid) for other in modules_of(etud)} - {mid}
+
+    by_module = {item["id_module"]: item for item in schedule}
+    day_of = {mid: item["date"] for mid, item in by_module.items() if item["id_creneau"] is not None}
+
+    displaced = {
+        mid for mid, item in by_module.items()
+        if item["id_creneau"] in cancelled or closed.intersection(item_salles(item))
+    }
+    rooms, salle_by_id = _room_index(salles)
+    for mid, etuds in added_by_module.items():
+        day = day_of.get(mid)
+        if day is None or mid in displaced:
+            continue
+        seats = sum(rooms.capacity[sid] for sid in item_salles(by_module[mid]))
+        if len(students(mid)) > seats or any(
+            day_of.get(other) == day for etud in etuds for other in modules_of(etud) if other != mid
+        ):
+            displaced.add(mid)
+
+    staff = _staff(problem)
+    modules_by_day = {}
+    for mid, item in by_module.items():
+        if mid in day_of and mid not in displaced:
+            for sid in item_salles(item):
+                rooms.take(item["id_creneau"], sid)
+            _prof_take(staff, problem, mid, item["id_creneau"])
+            modules_by_day.setdefault(item["date"], []).append(mid)
+
+    # most constrained first; the former creneau is tried before the others
+    pending = sorted(((mid, neighbours(mid)) for mid in displaced), key=lambda p: (-len(p[1]), p[0]))
+    repaired = {}
+    for mid, others in pending:
+        item = by_module[mid]
+        n_students = len(students(mid))
+        repaired[mid] = _unscheduled_item(mid, item["module"])
+        candidates = sorted(creneaux, key=lambda c: c[0] != item["id_creneau"])
+        for c in candidates:
+            if _day_taken(others, modules_by_day, c[1]) or not _prof_free(staff, problem, mid, c[0]):
+                continue
+            taken = _take_salles(rooms, salle_by_id, c[0], n_students)
+            if taken is None:
+                continue
+            _prof_take(staff, problem, mid, c[0])
+            modules_by_day.setdefault(c[1], []).append(mid)
+            repaired[mid] = _scheduled_item(mid, item["module"], taken[0], c, taken[1])
+            break
+
+    new_schedule = [repaired.get(item["id_module"], item) for item in schedule]
+    diff = [
+        repaired[item["id_module"]] for item in schedule
+        if item["id_module"] in repaired and repaired[item["id_module"]] != item
+    ]
+    return new_schedule, diff
+
+
+def room_efficiency(schedule, problem):
+    """Share of offered seats actually used by the placed exams (1.0 = perfect fit)."""
+    capacity = {s[0]: s[2] for s in problem["salles"]}
+    return utilisation(
+        (_size(problem, item["id_module"]),
+         sum(capacity[sid] or 0 for sid in item_salles(item)))
+        for item in schedule if item.get("id_salle") is not None
+    )
+
+
+def schedule_quality(schedule, problem, conflicts=None):
+    """Creneaux used by `schedule` against a cheap lower bound (see bounds.py)."""
+    if conflicts is None:
+        conflicts = _conflicts(problem)
+    module_students = problem["module_students"]
+    bounds = slot_lower_bound(
+        {m[0]: _size(problem, m[0]) for m in problem["modules"]},
+        conflicts,
+        [s[2] for s in problem["salles"]],
+        getattr(module_students, "max_student_load", 0)
+    )
+    return quality_report(
+        len({item["id_creneau"] for item in schedule if item.get("id_creneau") is not None}),
+        sum(1 for item in schedule if item.get("id_creneau") is None),
+        len(problem["creneaux"]),
+        bounds
+    )
+
+
+def _grid(creneaux):
+    """creneau id -> (day number, position within the day), for the soft costs."""
+    grid, slot, last = {}, 0, None
+    for cid, date_exam, _, _ in creneaux:
+        slot = slot + 1 if date_exam == last else 0
+        last = date_exam
+        grid[cid] = (date_exam.toordinal(), slot)
+    return grid
+
+
+def _schedule_state(schedule, problem, conflicts=None, soft_terms=None, keep=()):
+    """ScheduleState of `schedule`, with the soft constraints `soft_terms`
+    (cost_model.SOFT_TERMS by default) in its cost. Split exams and the
+    modules in `keep` are frozen."""
+    module_students = problem["module_students"]
+    return ScheduleState(
+        {
+            item["id_module"]: (item["id_creneau"], item["id_salle"])
+            if item.get("id_creneau") is not None else None
+            for item in schedule
+        },
+        module_students,
+        {m[0]: _size(problem, m[0]) for m in problem["modules"]},
+        {s[0]: s[2] for s in problem["salles"]},
+        [c[0] for c in problem["creneaux"]],
+        groups=problem.get("module_prof"),
+        conflicts=conflicts,
+        frozen={
+            item["id_module"]: item_salles(item)[1:]
+            for item in schedule
+            if item.get("repartition") or (item["id_module"] in keep and item.get("id_creneau") is not None)
+        },
+        days={c[0]: c[1] for c in problem["creneaux"]},
+        max_per_day=MAX_PER_DAY,
+        unavailable=problem.get("indisponibilites"),
+        grid=_grid(problem["creneaux"]),
+        soft_terms=soft_terms
+    )
+
+
+def schedule_cost(problem, schedule):
+    """Single objective shared by the optimiser and multi-start (lower is better)."""
+    return _schedule_state(schedule, problem).cost
+
+
+def optimise_schedule(schedule, problem, method="anneal", budget=30.0, seed=None, soft_terms=None,
+                      keep=()):
+    """Improve a schedule (from any engine) with a time-budgeted metaheuristic.
+
+    `method` is a key of optimizer.METHODS ("anneal" or "tabu"); `budget` is
+    in seconds. `soft_terms` overrides cost_model.SOFT_TERMS (exam spreading,
+    room changes); {} optimises hard constraints only. Modules in `keep`
+    (e.g. kept_modules of a warm start) are not moved.
+    Returns (schedule, stats) where schedule is the best one found.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown optimisation method: {method}")
+
+    salles = {s[0]: s for s in problem["salles"]}
+    creneaux = {c[0]: c for c in problem["creneaux"]}
+    state = _schedule_state(schedule, problem, _conflicts(problem), soft_terms, keep)
+    best, stats = METHODS[method](state, budget=budget, seed=seed)
+
+    improved = []
+    for item in schedule:
+        mid = item["id_module"]
+        placement = best.get(mid)
+        if item.get("repartition") or mid in keep:
+            improved.append(item)  # split and kept exams are not moved by the optimiser
+        elif placement is None:
+            improved.append(_unscheduled_item(mid, item["module"]))
+        else:
+            cid, sid = placement
+            improved.append(_scheduled_item(mid, item["module"], salles[sid], creneaux[cid]))
+    return improved, stats
+
+
+def solve_schedule(problem, seed=None, budget=0.0, mode="dsatur", method="anneal", initial=None):
+    """One seeded run: engine, then optimiser when `budget` > 0 (multi-start unit).
+
+    With an `initial` warm start the kept placements are not moved.
+    """
+    schedule = generate_exam_schedule(problem, mode=mode, seed=seed, initial=initial)
+    if budget > 0:
+        keep = kept_modules(schedule, initial) if initial else ()
+        schedule, _ = optimise_schedule(schedule, problem, method, budget, seed, keep=keep)
+    return schedule
+
+
+def _copy_rows(cur, table, columns, rows):
+    """COPY `rows` (tuples of ints or None) into `table` in one round trip."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join("\\N" if v is None else str(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+def persist_schedule_to_db(schedule, overwrite=True, clear_unscheduled=False, problem=None):
+    """Persist generated schedule into examen table, set-based.
+
+    The schedule is COPYed into temporary staging tables, then applied with
+    a handful of statements keyed on the unique examen.id_module: missing
+    examen rows are created, examen_salle rows of split exams are replaced,
+    and one UPDATE ... FROM schedules every exam whose salle or creneau
+    changed (the statement-level trigger then checks just those rows, in one pass).
 
     If an examen for the same module exists, update it when overwrite is True,
-    otherwise skip.
+    otherwise skip. Unscheduled items are skipped too, unless
+    `clear_unscheduled` (e.g. for a repair diff) empties their examen rows.
+    With the `problem` it was built from, the whole schedule is validated
+    first (see validator.py) and a ValueError lists every violation, before
+    any write. examen_salle rows are written before the examen rows are
+    scheduled so the capacity trigger sees all of them.
+    Returns the time spent in each phase, in seconds.
     """
-    conn = get_connection()
-    cur = conn.cursor()
+    timings = {}
+    started = last = time.perf_counter()
+
+    def phase(name):
+        nonlocal last
+        now = time.perf_counter()
+        timings[name] = now - last
+        last = now
 
+    if problem is not None:
+        violations = validate_schedule(schedule, problem)
+        if violations:
+            raise ValueError(
+                f"{len(violations)} constraint violation(s):\n"
+                + "\n".join(v["message"] for v in violations)
+            )
+        phase("validate")
+
+    exams, rooms = [], []
     for item in schedule:
         mid = item.get("id_module")
-        sid = item.get("id_salle")
-        cid = item.get("id_creneau")
-
         if mid is None:
             continue
-
-        if sid is None or cid is None:
-            # skip unscheduled modules
+        if item.get("id_salle") is None or item.get("id_creneau") is None:
+            if clear_unscheduled:
+                exams.append((mid, None, None))
             continue
+        exams.append((mid, item["id_salle"], item["id_creneau"]))
+        for sid, places in item.get("repartition") or []:
+            rooms.append((mid, sid, places))
 
-        cur.execute("SELECT id_examen FROM examen WHERE id_module = %s", (mid,))
-        row = cur.fetchone()
-        if row:
-            eid = row[0]
-            if overwrite:
-                cur.execute(
-                    "UPDATE examen SET id_salle=%s, id_creneau=%s WHERE id_examen=%s",
-                    (sid, cid, eid)
-                )
-        else:
-            cur.execute(
-                "INSERT INTO examen (id_module, id_salle, id_creneau) VALUES (%s,%s,%s)",
-                (mid, sid, cid)
-            )
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        CREATE TEMP TABLE examen_staging (
+            id_module INTEGER PRIMARY KEY, id_salle INTEGER, id_creneau INTEGER
+        ) ON COMMIT DROP
+    """)
+    cur.execute("""
+        CREATE TEMP TABLE examen_salle_staging (
+            id_module INTEGER, id_salle INTEGER, nb_places INTEGER
+        ) ON COMMIT DROP
+    """)
+    _copy_rows(cur, "examen_staging", ("id_module", "id_salle", "id_creneau"), exams)
+    _copy_rows(cur, "examen_salle_staging", ("id_module", "id_salle", "nb_places"), rooms)
+    if not overwrite:
+        cur.execute("DELETE FROM examen_staging s USING examen e WHERE e.id_module = s.id_module")
+    phase("copy")
+
+    # examen rows for new modules, created unscheduled: examen_salle needs their id
+    cur.execute("""
+        INSERT INTO examen (id_module)
+        SELECT id_module FROM examen_staging WHERE id_creneau IS NOT NULL
+        ON CONFLICT (id_module) DO NOTHING
+    """)
+    phase("insert")
+
+    cur.execute("""
+        DELETE FROM examen_salle es
+        USING examen e, examen_staging s
+        WHERE es.id_examen = e.id_examen AND e.id_module = s.id_module
+    """)
+    cur.execute("""
+        INSERT INTO examen_salle (id_examen, id_salle, nb_places)
+        SELECT e.id_examen, r.id_salle, r.nb_places
+        FROM examen_salle_staging r
+        JOIN examen_staging s ON s.id_module = r.id_module
+        JOIN examen e ON e.id_module = r.id_module
+    """)
+    phase("rooms")
+
+    cur.execute("""
+        UPDATE examen e
+        SET id_salle = s.id_salle, id_creneau = s.id_creneau
+        FROM examen_staging s
+        WHERE e.id_module = s.id_module
+          AND (e.id_salle, e.id_creneau) IS DISTINCT FROM (s.id_salle, s.id_creneau)
+    """)
+    phase("update")
 
     conn.commit()
     cur.close()
     conn.close()
+    phase("commit")
+    timings["total"] = time.perf_counter() - started
+    return timings
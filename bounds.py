@@ -0,0 +1,70 @@
+"""Cheap lower bounds on the number of creneaux a session needs.
+
+Every bound is valid on its own, so the best one is their maximum:
+- clique: modules that pairwise share students need distinct creneaux;
+- seats: all enrolled seats must fit in the seats offered per creneau;
+- rooms: each room holds one exam per creneau.
+Comparing it with the creneaux a schedule actually uses tells whether a run
+is already optimal or the slot grid is simply too small.
+"""
+import math
+
+
+def greedy_clique(graph, starts=50):
+    """A large clique of `graph` ({node: {neighbour: ...}}), grown greedily.
+
+    Tries the `starts` highest-degree nodes as seeds and adds, highest degree
+    first, every node adjacent to the whole clique so far.
+    """
+    order = sorted(graph, key=lambda n: -len(graph[n]))
+    best = []
+    for seed in order[:starts]:
+        if len(graph[seed]) + 1 <= len(best):
+            break
+        clique = [seed]
+        candidates = set(graph[seed])
+        for n in order:
+            if n in candidates:
+                clique.append(n)
+                candidates &= set(graph[n])
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+def slot_lower_bound(sizes, conflicts, capacities, max_student_load=0):
+    """Lower bound on creneaux needed to place every module.
+
+    `sizes` maps id_module -> students, `capacities` is the list of room
+    capacities (None: unlimited, then the seats never bind) and
+    `max_student_load` the most modules taken by one student (also a
+    clique, known for free from the enrollment store).
+    Returns {"bound", "clique", "seats", "rooms"}.
+    """
+    clique = max(len(greedy_clique(conflicts)), max_student_load) if sizes else 0
+    seats = math.inf if None in capacities else sum(capacities)
+    needed = sum(sizes.values())
+    bounds = {
+        "clique": clique,
+        "seats": math.ceil(needed / seats) if seats else 0,
+        "rooms": math.ceil(len(sizes) / len(capacities)) if capacities else 0,
+    }
+    bounds["bound"] = max(bounds.values())
+    return bounds
+
+
+def quality_report(n_used, n_unplaced, n_creneaux, bounds):
+    """Gap between a schedule and the bound; `optimal` when nothing is left to win.
+
+    The bound is for placing every module, so the gap is None while some
+    are unplaced (`unplaced`).
+    """
+    return {
+        **bounds,
+        "creneaux": n_creneaux,
+        "used": n_used,
+        "unplaced": n_unplaced,
+        "gap": n_used - bounds["bound"] if n_unplaced == 0 else None,
+        "optimal": n_unplaced == 0 and n_used <= bounds["bound"],
+        "grid_too_small": bounds["bound"] > n_creneaux,
+    }
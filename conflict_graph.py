@@ -0,0 +1,65 @@
+"""Module conflict graph: which modules share students, and how many."""
+import numpy as np
+from scipy import sparse
+
+
+def build_conflict_graph(module_students):
+    """Compute co-enrollment between modules once.
+
+    `module_students` maps id_module -> iterable of id_etud, or is an
+    enrollment.Enrollment whose CSR arrays are used directly.
+    Returns {id_module: {other_id_module: shared_students}}; two modules
+    conflict iff one appears in the other's adjacency dict.
+    The counts come from E^T E, E being the sparse student x module matrix.
+    """
+    mids = list(module_students)
+    graph = {mid: {} for mid in mids}
+
+    if hasattr(module_students, "matrix"):
+        enrollment = module_students.matrix()
+    else:
+        student_index = {}
+        rows, cols = [], []
+        for j, mid in enumerate(mids):
+            for sid in module_students[mid]:
+                rows.append(student_index.setdefault(sid, len(student_index)))
+                cols.append(j)
+        enrollment = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(student_index), len(mids)),
+        )
+    if not enrollment.nnz:
+        return graph
+
+    co = (enrollment.T @ enrollment).tocoo()
+
+    for i, j, n in zip(co.row, co.col, co.data):
+        if i != j:
+            graph[mids[i]][mids[j]] = int(n)
+
+    return graph
+
+
+def connected_components(graph):
+    """Groups of modules linked by shared students, largest first.
+
+    Modules in different components never conflict, so each group can be
+    scheduled on its own.
+    """
+    seen = set()
+    components = []
+    for start in graph:
+        if start in seen:
+            continue
+        seen.add(start)
+        component = [start]
+        stack = [start]
+        while stack:
+            for other in graph.get(stack.pop(), {}):
+                if other not in seen:
+                    seen.add(other)
+                    component.append(other)
+                    stack.append(other)
+        components.append(component)
+    components.sort(key=len, reverse=True)
+    return components
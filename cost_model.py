@@ -0,0 +1,163 @@
+"""Incrementally maintained schedule cost for local search: hard student
+clashes (IncrementalCost) and weighted soft constraints (SoftCost)."""
+from collections import defaultdict
+
+
+CLASH_WEIGHT = 10
+
+
+class IncrementalCost:
+    """Student clash cost kept up to date move by move.
+
+    `assignment` maps an exam key -> slot (a creneau, or a day when the rule
+    is one exam per day) and `students_of` maps the same key -> the students
+    sitting that exam. Every extra exam a student has in one slot costs
+    CLASH_WEIGHT, as generate_edt.calcul_score did.
+    Evaluating or applying a move only touches the students of the moved exams.
+    """
+
+    def __init__(self, assignment, students_of):
+        self.assignment = dict(assignment)
+        self.students_of = students_of
+        self.occupancy = defaultdict(int)  # (student, creneau) -> nb exams
+        self.cost = 0
+        self.apply(dict(self.assignment), initial=True)
+
+    def _changes(self, moves, initial=False):
+        change = defaultdict(int)
+        for key, new_c in moves.items():
+            old_c = None if initial else self.assignment.get(key)
+            if old_c == new_c:
+                continue
+            students = self.students_of.get(key, ())
+            if hasattr(students, "tolist"):
+                students = students.tolist()  # NumPy slices from an Enrollment
+            for s in students:
+                if old_c is not None:
+                    change[(s, old_c)] -= 1
+                if new_c is not None:
+                    change[(s, new_c)] += 1
+        return change
+
+    def delta(self, moves):
+        """Cost change if every key in `moves` went to its new creneau."""
+        d = 0
+        for k, diff in self._changes(moves).items():
+            if diff:
+                n = self.occupancy.get(k, 0)
+                d += CLASH_WEIGHT * (max(n + diff - 1, 0) - max(n - 1, 0))
+        return d
+
+    def apply(self, moves, initial=False):
+        """Commit `moves` ({key: creneau or None}) and return the cost change."""
+        d = 0
+        for k, diff in self._changes(moves, initial).items():
+            if diff:
+                n = self.occupancy.get(k, 0)
+                d += CLASH_WEIGHT * (max(n + diff - 1, 0) - max(n - 1, 0))
+                if n + diff:
+                    self.occupancy[k] = n + diff
+                else:
+                    self.occupancy.pop(k, None)
+        for key, new_c in moves.items():
+            self.assignment[key] = new_c
+        self.cost += d
+        return d
+
+    def swap_moves(self, a, b):
+        """Moves exchanging the creneaux of exams `a` and `b`."""
+        return {a: self.assignment[b], b: self.assignment[a]}
+
+
+# ---- soft constraints ----------------------------------------------------
+# A term gets one student's exams as a sorted list of (day, slot, salle)
+# and returns a penalty; SOFT_TERMS maps a name to (term, weight).
+
+MIN_GAP_DAYS = 2
+
+
+def gap_days(exams):
+    """Successive exams fewer than MIN_GAP_DAYS days apart, by how much."""
+    return sum(max(0, MIN_GAP_DAYS - (b[0] - a[0])) for a, b in zip(exams, exams[1:]))
+
+
+def back_to_back(exams):
+    """Exams in adjacent creneaux of the same day."""
+    return sum(1 for a, b in zip(exams, exams[1:]) if a[0] == b[0] and b[1] - a[1] == 1)
+
+
+def room_changes(exams):
+    """Rooms changed between exams of the same day."""
+    return sum(1 for a, b in zip(exams, exams[1:]) if a[0] == b[0] and a[2] != b[2])
+
+
+SOFT_TERMS = {
+    "gap_days": (gap_days, 1),
+    "back_to_back": (back_to_back, 2),
+    "room_changes": (room_changes, 1),
+}
+
+
+class SoftCost:
+    """Weighted soft-constraint cost kept up to date move by move.
+
+    `assignment` maps an exam key -> (creneau, salle) or None, `grid` maps
+    creneau -> (day, slot): day numbers one apart for consecutive days, slot
+    the position within the day. Each student keeps a vector of their exams'
+    (day, slot, salle); a move only re-evaluates the students of the moved
+    exams, with every term in `terms` (see SOFT_TERMS).
+    """
+
+    def __init__(self, assignment, students_of, grid, terms=None):
+        self.students_of = students_of
+        self.grid = grid
+        self.terms = SOFT_TERMS if terms is None else terms
+        self.exams = {}  # student -> {key: (day, slot, salle)}
+        self.student_cost = {}
+        self.cost = 0
+        self.apply({k: p for k, p in assignment.items() if p is not None})
+
+    def _students(self, key):
+        students = self.students_of.get(key, ())
+        return students.tolist() if hasattr(students, "tolist") else students
+
+    def _evaluate(self, exams):
+        vector = sorted(exams.values())
+        return sum(weight * term(vector) for term, weight in self.terms.values())
+
+    def _updated(self, moves):
+        """(student, their exams after `moves`) for every student moved."""
+        touched = {}
+        for key, placement in moves.items():
+            for s in self._students(key):
+                exams = touched.get(s)
+                if exams is None:
+                    exams = touched[s] = dict(self.exams.get(s, ()))
+                if placement is None:
+                    exams.pop(key, None)
+                else:
+                    day, slot = self.grid[placement[0]]
+                    exams[key] = (day, slot, placement[1])
+        return touched.items()
+
+    def delta(self, moves):
+        """Cost change if every key in `moves` went to its new placement."""
+        return sum(
+            self._evaluate(exams) - self.student_cost.get(s, 0)
+            for s, exams in self._updated(moves)
+        )
+
+    def apply(self, moves):
+        """Commit `moves` ({key: placement or None}) and return the cost change."""
+        d = 0
+        for s, exams in self._updated(moves):
+            cost = self._evaluate(exams)
+            d += cost - self.student_cost.get(s, 0)
+            if exams:
+                self.exams[s] = exams
+                self.student_cost[s] = cost
+            else:
+                self.exams.pop(s, None)
+                self.student_cost.pop(s, None)
+        self.cost += d
+        return d
@@ -20,6 +20,28 @@ def count_salles():
     return result
 
 
+def list_salles():
+    """(id_salle, nom, capacite) of every room, by name."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT id_salle, nom, capacite FROM salle ORDER BY nom;")
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+    return rows
+
+
+def list_creneaux():
+    """(id_creneau, date_exam, heure_debut, heure_fin) of every creneau, in time order."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT id_creneau, date_exam, heure_debut, heure_fin FROM creneau ORDER BY date_exam, heure_debut;")
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+    return rows
+
+
 def count_etudiants():
     conn = get_connection()
     cur = conn.cursor()
@@ -50,26 +72,51 @@ def count_conflicts():
     """Return number of student-day conflicts (students who have >1 exam same day)."""
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute("""
-        SELECT COUNT(*) FROM (
-            SELECT i.id_etud, c.date_exam, COUNT(*) as nb
-            FROM inscription i
-            JOIN examen e ON i.id_module = e.id_module
-            JOIN creneau c ON e.id_creneau = c.id_creneau
-            GROUP BY i.id_etud, c.date_exam
-            HAVING COUNT(*) > 1
-        ) t;
-    """)
+    # student_day_load is kept up to date by triggers on examen and inscription
+    cur.execute("SELECT COUNT(*) FROM student_day_load WHERE nb_examens > 1;")
     result = cur.fetchone()[0]
     cur.close()
     conn.close()
     return result
 
 
+def taux_remplissage_salles():
+    """Enrolled students / seats offered over scheduled exams (reads module.nb_inscrits)."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT SUM(m.nb_inscrits), SUM(COALESCE(split.seats, s.capacite))
+        FROM examen e
+        JOIN module m ON m.id_module = e.id_module
+        JOIN salle s ON s.id_salle = e.id_salle
+        LEFT JOIN (
+            SELECT es.id_examen, SUM(sa.capacite) AS seats
+            FROM examen_salle es
+            JOIN salle sa ON sa.id_salle = es.id_salle
+            GROUP BY es.id_examen
+        ) split ON split.id_examen = e.id_examen
+        WHERE e.id_creneau IS NOT NULL;
+    """)
+    inscrits, places = cur.fetchone()
+    cur.close()
+    conn.close()
+    return inscrits / places if places else 0.0
+
+
 def count_salles_utilisees():
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute("SELECT COUNT(DISTINCT id_salle) FROM examen WHERE id_salle IS NOT NULL;")
+    # split exams also occupy the salles listed in examen_salle
+    cur.execute("""
+        SELECT COUNT(DISTINCT id_salle) FROM (
+            SELECT id_salle FROM examen WHERE id_salle IS NOT NULL
+            UNION ALL
+            SELECT es.id_salle
+            FROM examen_salle es
+            JOIN examen e ON e.id_examen = es.id_examen
+            WHERE e.id_salle IS NOT NULL
+        ) salles;
+    """)
     result = cur.fetchone()[0]
     cur.close()
     conn.close()
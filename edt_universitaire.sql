@@ -43,8 +43,10 @@ CREATE TABLE IF NOT EXISTS module (
 	nom TEXT NOT NULL,
 	credits INTEGER DEFAULT 3,
 	id_form INTEGER REFERENCES formation(id_form),
-	pre_req_id INTEGER REFERENCES module(id_module)
+	pre_req_id INTEGER REFERENCES module(id_module),
+	nb_inscrits INTEGER NOT NULL DEFAULT 0 -- maintained by trg_inscription_count_*
 );
+ALTER TABLE module ADD COLUMN IF NOT EXISTS nb_inscrits INTEGER NOT NULL DEFAULT 0;
 
 -- Students
 CREATE TABLE IF NOT EXISTS etudiant (
@@ -83,6 +85,14 @@ CREATE TABLE IF NOT EXISTS examen (
 	duree_minutes INTEGER DEFAULT 90
 );
 
+-- Rooms of exams split over several salles (one row per room)
+CREATE TABLE IF NOT EXISTS examen_salle (
+	id_examen INTEGER REFERENCES examen(id_examen) ON DELETE CASCADE,
+	id_salle INTEGER REFERENCES salle(id_salle),
+	nb_places INTEGER NOT NULL,
+	PRIMARY KEY (id_examen, id_salle)
+);
+
 -- Surveillance assignments (which professor supervises which exam)
 CREATE TABLE IF NOT EXISTS surveillance (
 	id_surv SERIAL PRIMARY KEY,
@@ -90,12 +100,53 @@ CREATE TABLE IF NOT EXISTS surveillance (
 	id_prof INTEGER REFERENCES professeur(id_prof)
 );
 
+-- Creneaux a professor cannot take (exam or supervision)
+CREATE TABLE IF NOT EXISTS indisponibilite (
+	id_prof INTEGER REFERENCES professeur(id_prof) ON DELETE CASCADE,
+	id_creneau INTEGER REFERENCES creneau(id_creneau) ON DELETE CASCADE,
+	PRIMARY KEY (id_prof, id_creneau)
+);
+
+-- Exams per student and day, kept up to date by the trg_*_day_load triggers
+-- so the student conflict check and KPI read it instead of joining
+-- inscription, examen and creneau. Rows that drop to 0 are kept.
+CREATE TABLE IF NOT EXISTS student_day_load (
+	id_etud INTEGER REFERENCES etudiant(id_etud) ON DELETE CASCADE,
+	date_exam DATE NOT NULL,
+	nb_examens INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (id_etud, date_exam)
+);
+
 -- Indexes to speed up queries
 CREATE INDEX IF NOT EXISTS idx_inscription_module ON inscription(id_module);
 CREATE INDEX IF NOT EXISTS idx_inscription_etud ON inscription(id_etud);
+-- One examen per module (persist relies on ON CONFLICT (id_module)).
+-- Databases created before the index may hold duplicates: nothing is
+-- deleted here, they are listed and migration_examen_unique.sql removes
+-- them once.
+DO $$
+DECLARE
+	v_doublons TEXT;
+BEGIN
+	SELECT string_agg(format('module %s: examen %s', id_module, ids), '; ')
+	INTO v_doublons
+	FROM (
+		SELECT id_module, array_agg(id_examen ORDER BY id_examen) AS ids
+		FROM examen
+		WHERE id_module IS NOT NULL
+		GROUP BY id_module
+		HAVING COUNT(*) > 1
+	) d;
+	IF v_doublons IS NOT NULL THEN
+		RAISE EXCEPTION 'Duplicate examen rows prevent uq_examen_module: %', v_doublons
+			USING HINT = 'Run migration_examen_unique.sql once, then apply this script again.';
+	END IF;
+END $$;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_examen_module ON examen(id_module);
 CREATE INDEX IF NOT EXISTS idx_examen_prof ON examen(id_prof);
 CREATE INDEX IF NOT EXISTS idx_examen_creneau ON examen(id_creneau);
 CREATE INDEX IF NOT EXISTS idx_creneau_date ON creneau(date_exam);
+CREATE INDEX IF NOT EXISTS idx_student_day_load_conflicts ON student_day_load(date_exam) WHERE nb_examens > 1;
 
 -- Partial index example: frequently query rooms with capacity >= X
 CREATE INDEX IF NOT EXISTS idx_salle_capacite ON salle(capacite);
@@ -105,78 +156,267 @@ CREATE INDEX IF NOT EXISTS idx_salle_capacite ON salle(capacite);
 -- 2) Enforce per-professor: max 3 exams per day
 -- 3) Enforce room capacity vs enrolled students
 
--- Function: check constraints before inserting/updating examen
+-- Function: check constraints after a statement inserting/updating examen.
+-- Statement-level: `new_rows` (transition table) holds every row written
+-- by the statement, checked with one set-based query per rule against the
+-- final state of examen. All violations are raised together.
 CREATE OR REPLACE FUNCTION fn_check_examen_constraints()
 RETURNS TRIGGER AS $$
 DECLARE
-	exam_date DATE;
-	student_count INTEGER;
-	conflict_count INTEGER;
-	prof_count INTEGER;
+	violations TEXT[] := '{}';
+	v_found TEXT[];
 BEGIN
-	IF NEW.id_creneau IS NULL THEN
-		-- not scheduled yet, allow
-		RETURN NEW;
-	END IF;
-
-	SELECT date_exam INTO exam_date FROM creneau WHERE id_creneau = NEW.id_creneau;
-
-	-- 1) Room capacity check
-	IF NEW.id_salle IS NOT NULL THEN
-		SELECT COUNT(*) INTO student_count
-		FROM inscription i
-		WHERE i.id_module = NEW.id_module;
-
-		IF student_count IS NULL THEN
-			student_count := 0;
-		END IF;
-
-		PERFORM 1 FROM salle s WHERE s.id_salle = NEW.id_salle AND s.capacite >= student_count;
-		IF NOT FOUND THEN
-			RAISE EXCEPTION 'Room % capacity insufficient for module % (students=%)', NEW.id_salle, NEW.id_module, student_count;
-		END IF;
-	END IF;
+	-- 1) Room capacity check (split exams: all their rooms in examen_salle)
+	SELECT array_agg(format('Room %s capacity insufficient for module %s (students=%s, seats=%s)',
+	                        n.id_salle, n.id_module, m.nb_inscrits, COALESCE(split.seats, s.capacite)))
+	INTO v_found
+	FROM new_rows n
+	JOIN salle s ON s.id_salle = n.id_salle
+	JOIN module m ON m.id_module = n.id_module
+	LEFT JOIN (
+		SELECT es.id_examen, SUM(sa.capacite) AS seats
+		FROM examen_salle es
+		JOIN salle sa ON sa.id_salle = es.id_salle
+		WHERE es.id_examen IN (SELECT id_examen FROM new_rows)
+		GROUP BY es.id_examen
+	) split ON split.id_examen = n.id_examen
+	WHERE n.id_creneau IS NOT NULL
+	  AND COALESCE(split.seats, s.capacite) < m.nb_inscrits;
+	violations := violations || COALESCE(v_found, '{}');
+
+	-- 2) Student conflict: each student max 1 exam per day, looked up in
+	--    student_day_load (already updated by trg_examen_day_load_*) for the
+	--    students and days the statement touched
+	SELECT array_agg(format('Student conflict: %s student(s) have more than one exam on %s',
+	                        t.nb_students, t.date_exam))
+	INTO v_found
+	FROM (
+		SELECT l.date_exam, COUNT(*) AS nb_students
+		FROM (
+			SELECT DISTINCT i.id_etud, c.date_exam
+			FROM new_rows n
+			JOIN creneau c ON c.id_creneau = n.id_creneau
+			JOIN inscription i ON i.id_module = n.id_module
+		) k
+		JOIN student_day_load l ON l.id_etud = k.id_etud AND l.date_exam = k.date_exam
+		WHERE l.nb_examens > 1
+		GROUP BY l.date_exam
+	) t;
+	violations := violations || COALESCE(v_found, '{}');
 
-	-- 2) Student conflict: each student max 1 exam per day
-	SELECT COUNT(*) INTO conflict_count
+	-- 3) Professor limit: max 3 exams per day
+	SELECT array_agg(format('Professor %s would exceed 3 exams on %s (%s exams)',
+	                        t.id_prof, t.date_exam, t.nb))
+	INTO v_found
 	FROM (
-		SELECT i.id_etud
-		FROM inscription i
-		JOIN examen e ON e.id_module = i.id_module
+		SELECT e.id_prof, c.date_exam, COUNT(*) AS nb
+		FROM examen e
 		JOIN creneau c ON c.id_creneau = e.id_creneau
-		WHERE c.date_exam = exam_date
-		  AND i.id_etud IN (SELECT id_etud FROM inscription WHERE id_module = NEW.id_module)
-		  AND (e.id_examen IS DISTINCT FROM NEW.id_examen)
-		LIMIT 1
+		WHERE (e.id_prof, c.date_exam) IN (
+			SELECT n.id_prof, c2.date_exam
+			FROM new_rows n JOIN creneau c2 ON c2.id_creneau = n.id_creneau
+			WHERE n.id_prof IS NOT NULL
+		)
+		GROUP BY e.id_prof, c.date_exam
+		HAVING COUNT(*) > 3
 	) t;
+	violations := violations || COALESCE(v_found, '{}');
 
-	IF conflict_count > 0 THEN
-		RAISE EXCEPTION 'Student conflict: some students of module % already have an exam on %', NEW.id_module, exam_date;
+	IF array_length(violations, 1) > 0 THEN
+		RAISE EXCEPTION '% constraint violation(s):%', array_length(violations, 1),
+			E'\n' || array_to_string(violations, E'\n');
 	END IF;
 
-	-- 3) Professor limit: max 3 exams per day
-	IF NEW.id_prof IS NOT NULL THEN
-		SELECT COUNT(*) INTO prof_count
-		FROM examen e
-		JOIN creneau c ON c.id_creneau = e.id_creneau
-		WHERE e.id_prof = NEW.id_prof
-		  AND c.date_exam = exam_date
-		  AND (e.id_examen IS DISTINCT FROM NEW.id_examen);
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
 
-		IF prof_count >= 3 THEN
-			RAISE EXCEPTION 'Professor % would exceed 3 exams on %', NEW.id_prof, exam_date;
-		END IF;
+-- student_day_load: exams per (student, day), moved by statement-level
+-- triggers on examen and inscription. Creneau dates are assumed fixed once
+-- exams are placed on them.
+CREATE OR REPLACE FUNCTION fn_student_day_load_examen()
+RETURNS TRIGGER AS $$
+BEGIN
+	IF TG_OP = 'DELETE' THEN
+		UPDATE student_day_load l
+		SET nb_examens = l.nb_examens - d.nb
+		FROM (
+			SELECT i.id_etud, c.date_exam, COUNT(*) AS nb
+			FROM old_rows o
+			JOIN creneau c ON c.id_creneau = o.id_creneau
+			JOIN inscription i ON i.id_module = o.id_module
+			GROUP BY i.id_etud, c.date_exam
+		) d
+		WHERE l.id_etud = d.id_etud AND l.date_exam = d.date_exam;
+	ELSIF TG_OP = 'INSERT' THEN
+		INSERT INTO student_day_load AS l (id_etud, date_exam, nb_examens)
+		SELECT i.id_etud, c.date_exam, COUNT(*)
+		FROM new_rows n
+		JOIN creneau c ON c.id_creneau = n.id_creneau
+		JOIN inscription i ON i.id_module = n.id_module
+		GROUP BY i.id_etud, c.date_exam
+		ON CONFLICT (id_etud, date_exam) DO UPDATE SET nb_examens = l.nb_examens + EXCLUDED.nb_examens;
+	ELSE
+		-- UPDATE: only rows whose module or creneau changed move the load
+		UPDATE student_day_load l
+		SET nb_examens = l.nb_examens - d.nb
+		FROM (
+			SELECT i.id_etud, c.date_exam, COUNT(*) AS nb
+			FROM old_rows o
+			JOIN new_rows n ON n.id_examen = o.id_examen
+			JOIN creneau c ON c.id_creneau = o.id_creneau
+			JOIN inscription i ON i.id_module = o.id_module
+			WHERE (o.id_module, o.id_creneau) IS DISTINCT FROM (n.id_module, n.id_creneau)
+			GROUP BY i.id_etud, c.date_exam
+		) d
+		WHERE l.id_etud = d.id_etud AND l.date_exam = d.date_exam;
+
+		INSERT INTO student_day_load AS l (id_etud, date_exam, nb_examens)
+		SELECT i.id_etud, c.date_exam, COUNT(*)
+		FROM new_rows n
+		JOIN old_rows o ON o.id_examen = n.id_examen
+		JOIN creneau c ON c.id_creneau = n.id_creneau
+		JOIN inscription i ON i.id_module = n.id_module
+		WHERE (o.id_module, o.id_creneau) IS DISTINCT FROM (n.id_module, n.id_creneau)
+		GROUP BY i.id_etud, c.date_exam
+		ON CONFLICT (id_etud, date_exam) DO UPDATE SET nb_examens = l.nb_examens + EXCLUDED.nb_examens;
 	END IF;
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
 
-	RETURN NEW;
+CREATE OR REPLACE FUNCTION fn_student_day_load_inscription()
+RETURNS TRIGGER AS $$
+BEGIN
+	IF TG_OP IN ('DELETE', 'UPDATE') THEN
+		UPDATE student_day_load l
+		SET nb_examens = l.nb_examens - d.nb
+		FROM (
+			SELECT o.id_etud, c.date_exam, COUNT(*) AS nb
+			FROM old_rows o
+			JOIN examen e ON e.id_module = o.id_module
+			JOIN creneau c ON c.id_creneau = e.id_creneau
+			GROUP BY o.id_etud, c.date_exam
+		) d
+		WHERE l.id_etud = d.id_etud AND l.date_exam = d.date_exam;
+	END IF;
+	IF TG_OP IN ('INSERT', 'UPDATE') THEN
+		INSERT INTO student_day_load AS l (id_etud, date_exam, nb_examens)
+		SELECT n.id_etud, c.date_exam, COUNT(*)
+		FROM new_rows n
+		JOIN examen e ON e.id_module = n.id_module
+		JOIN creneau c ON c.id_creneau = e.id_creneau
+		GROUP BY n.id_etud, c.date_exam
+		ON CONFLICT (id_etud, date_exam) DO UPDATE SET nb_examens = l.nb_examens + EXCLUDED.nb_examens;
+	END IF;
+	RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger on examen
+-- Triggers on examen (a trigger with transition tables handles one event).
+-- Triggers on the same event fire in name order: day_load before validate.
+DROP TRIGGER IF EXISTS trg_examen_day_load_insert ON examen;
+CREATE TRIGGER trg_examen_day_load_insert
+AFTER INSERT ON examen
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_examen();
+
+DROP TRIGGER IF EXISTS trg_examen_day_load_delete ON examen;
+CREATE TRIGGER trg_examen_day_load_delete
+AFTER DELETE ON examen
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_examen();
+
+DROP TRIGGER IF EXISTS trg_examen_day_load_update ON examen;
+CREATE TRIGGER trg_examen_day_load_update
+AFTER UPDATE ON examen
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_examen();
+
 DROP TRIGGER IF EXISTS trg_examen_constraints ON examen;
-CREATE TRIGGER trg_examen_constraints
-BEFORE INSERT OR UPDATE ON examen
-FOR EACH ROW EXECUTE FUNCTION fn_check_examen_constraints();
+DROP TRIGGER IF EXISTS trg_examen_constraints_insert ON examen;
+DROP TRIGGER IF EXISTS trg_examen_constraints_update ON examen;
+DROP TRIGGER IF EXISTS trg_examen_validate_insert ON examen;
+CREATE TRIGGER trg_examen_validate_insert
+AFTER INSERT ON examen
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_check_examen_constraints();
+
+DROP TRIGGER IF EXISTS trg_examen_validate_update ON examen;
+CREATE TRIGGER trg_examen_validate_update
+AFTER UPDATE ON examen
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_check_examen_constraints();
+
+-- module.nb_inscrits: enrollment count kept up to date by statement-level
+-- triggers on inscription, so capacity checks and loaders read one column
+-- instead of counting inscription rows.
+CREATE OR REPLACE FUNCTION fn_module_nb_inscrits()
+RETURNS TRIGGER AS $$
+BEGIN
+	IF TG_OP IN ('INSERT', 'UPDATE') THEN
+		UPDATE module m
+		SET nb_inscrits = m.nb_inscrits + d.nb
+		FROM (SELECT id_module, COUNT(*) AS nb FROM new_rows GROUP BY id_module) d
+		WHERE m.id_module = d.id_module;
+	END IF;
+	IF TG_OP IN ('DELETE', 'UPDATE') THEN
+		UPDATE module m
+		SET nb_inscrits = m.nb_inscrits - d.nb
+		FROM (SELECT id_module, COUNT(*) AS nb FROM old_rows GROUP BY id_module) d
+		WHERE m.id_module = d.id_module;
+	END IF;
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_inscription_count_insert ON inscription;
+CREATE TRIGGER trg_inscription_count_insert
+AFTER INSERT ON inscription
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_module_nb_inscrits();
+
+DROP TRIGGER IF EXISTS trg_inscription_count_delete ON inscription;
+CREATE TRIGGER trg_inscription_count_delete
+AFTER DELETE ON inscription
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_module_nb_inscrits();
+
+DROP TRIGGER IF EXISTS trg_inscription_count_update ON inscription;
+CREATE TRIGGER trg_inscription_count_update
+AFTER UPDATE ON inscription
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_module_nb_inscrits();
+
+DROP TRIGGER IF EXISTS trg_inscription_day_load_insert ON inscription;
+CREATE TRIGGER trg_inscription_day_load_insert
+AFTER INSERT ON inscription
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_inscription();
+
+DROP TRIGGER IF EXISTS trg_inscription_day_load_delete ON inscription;
+CREATE TRIGGER trg_inscription_day_load_delete
+AFTER DELETE ON inscription
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_inscription();
+
+DROP TRIGGER IF EXISTS trg_inscription_day_load_update ON inscription;
+CREATE TRIGGER trg_inscription_day_load_update
+AFTER UPDATE ON inscription
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_inscription();
+
+-- Backfill for databases created before the counters existed
+UPDATE module m
+SET nb_inscrits = (SELECT COUNT(*) FROM inscription i WHERE i.id_module = m.id_module);
+
+TRUNCATE student_day_load;
+INSERT INTO student_day_load (id_etud, date_exam, nb_examens)
+SELECT i.id_etud, c.date_exam, COUNT(*)
+FROM inscription i
+JOIN examen e ON e.id_module = i.id_module
+JOIN creneau c ON c.id_creneau = e.id_creneau
+GROUP BY i.id_etud, c.date_exam;
 
 -- Sample seed data (minimal set to test the system)
 -- Departments
@@ -0,0 +1,148 @@
+"""Compact enrollment store: module <-> student links as int32 CSR arrays.
+
+Module and student ids are remapped to dense indices (0..N-1, in id order).
+students(mid) is a slice of one int32 array instead of a Python set, which
+keeps a million inscriptions in a few megabytes. The object also behaves
+as a read-only mapping id_module -> student indices, so code written
+against the former dict of sets keeps working.
+"""
+import time
+
+import numpy as np
+
+
+EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _csr(rows, cols, n_rows):
+    """(ptr, indices) of a CSR matrix with one entry per (row, col) pair."""
+    order = np.lexsort((cols, rows))
+    ptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=ptr[1:])
+    return ptr, cols[order].astype(np.int32)
+
+
+class Enrollment:
+    def __init__(self, module_ids, student_ids, load_seconds=0.0):
+        """Build from two parallel arrays of (id_module, id_etud) pairs."""
+        started = time.perf_counter()
+        module_ids = np.asarray(module_ids, dtype=np.int64)
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+
+        self.module_ids, m_idx = np.unique(module_ids, return_inverse=True)
+        self.student_ids, s_idx = np.unique(student_ids, return_inverse=True)
+        self.module_ptr, self.module_students = _csr(m_idx, s_idx, len(self.module_ids))
+        self.student_ptr, self.student_modules = _csr(s_idx, m_idx, len(self.student_ids))
+        self._module_pos = {mid: i for i, mid in enumerate(self.module_ids.tolist())}
+
+        self.load_seconds = load_seconds + time.perf_counter() - started
+
+    @classmethod
+    def from_cursor(cls, cur, fetch_size=50000):
+        """Stream (id_module, id_etud) rows from an executed cursor in chunks."""
+        started = time.perf_counter()
+        chunks = []
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.int64).reshape(-1, 2))
+        pairs = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+        return cls(pairs[:, 0], pairs[:, 1], time.perf_counter() - started)
+
+    @property
+    def n_modules(self):
+        return len(self.module_ids)
+
+    @property
+    def n_students(self):
+        return len(self.student_ids)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (
+            self.module_ids, self.student_ids,
+            self.module_ptr, self.module_students,
+            self.student_ptr, self.student_modules,
+        ))
+
+    @property
+    def max_student_load(self):
+        """Most modules taken by a single student."""
+        return int(np.diff(self.student_ptr).max()) if self.n_students else 0
+
+    def students(self, mid):
+        """Dense student indices enrolled in module `mid` (int32 array)."""
+        i = self._module_pos.get(mid)
+        if i is None:
+            return EMPTY
+        return self.module_students[self.module_ptr[i]:self.module_ptr[i + 1]]
+
+    def module_index(self, mid):
+        """Dense index of module `mid`, or None if nobody is enrolled."""
+        return self._module_pos.get(mid)
+
+    def index_of(self, student_id):
+        """Dense index of `student_id`, or None if not enrolled anywhere."""
+        i = int(np.searchsorted(self.student_ids, student_id))
+        if i < self.n_students and self.student_ids[i] == student_id:
+            return i
+        return None
+
+    def modules_of(self, student):
+        """Module ids of the student at dense index `student`."""
+        return self.module_ids[self.student_modules[self.student_ptr[student]:self.student_ptr[student + 1]]]
+
+    def size(self, mid):
+        i = self._module_pos.get(mid)
+        return 0 if i is None else int(self.module_ptr[i + 1] - self.module_ptr[i])
+
+    def subset(self, module_ids):
+        """Enrollment restricted to `module_ids` (student indices are renumbered)."""
+        keep = [self._module_pos[mid] for mid in module_ids if mid in self._module_pos]
+        mods, studs = [], []
+        for i in keep:
+            lo, hi = self.module_ptr[i], self.module_ptr[i + 1]
+            mods.append(np.full(hi - lo, self.module_ids[i], dtype=np.int64))
+            studs.append(self.student_ids[self.module_students[lo:hi]])
+        if not keep:
+            return Enrollment(EMPTY, EMPTY)
+        return Enrollment(np.concatenate(mods), np.concatenate(studs))
+
+    def matrix(self):
+        """Student x module scipy CSR matrix of ones."""
+        from scipy import sparse
+        return sparse.csr_matrix(
+            (np.ones(len(self.student_modules), dtype=np.int32), self.student_modules, self.student_ptr),
+            shape=(self.n_students, self.n_modules),
+        )
+
+    def report(self):
+        return {
+            "inscriptions": int(len(self.module_students)),
+            "modules": self.n_modules,
+            "etudiants": self.n_students,
+            "memory_bytes": self.nbytes,
+            "load_seconds": self.load_seconds,
+        }
+
+    # read-only mapping interface: id_module -> student indices
+    def get(self, mid, default=None):
+        return self.students(mid) if mid in self._module_pos else default
+
+    def __getitem__(self, mid):
+        if mid not in self._module_pos:
+            raise KeyError(mid)
+        return self.students(mid)
+
+    def __contains__(self, mid):
+        return mid in self._module_pos
+
+    def __iter__(self):
+        return iter(self._module_pos)
+
+    def __len__(self):
+        return self.n_modules
+
+    def items(self):
+        return ((mid, self.students(mid)) for mid in self._module_pos)
@@ -1,5 +1,5 @@
 
- import streamlit as st
+import streamlit as st
 import pandas as pd
 from bd import get_connection
 
@@ -136,7 +136,13 @@ try:
     cur.execute("""
         SELECT 
             m.nom,
-            s.nom,
+            COALESCE(
+                (SELECT string_agg(sa.nom, ' + ' ORDER BY es.nb_places DESC, es.id_salle)
+                 FROM examen_salle es
+                 JOIN salle sa ON sa.id_salle = es.id_salle
+                 WHERE es.id_examen = e.id_examen),
+                s.nom
+            ),
             c.date_exam,
             c.heure_debut,
             c.heure_fin
@@ -175,4 +181,4 @@ if st.button("🚪 Se déconnecter"):
     st.switch_page("pages/login.py")
 
 # ================== FOOTER ==================
-st.caption("Projet universitaire — Interface Enseignant"
+st.caption("Projet universitaire — Interface Enseignant")
@@ -91,6 +91,8 @@ try:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("📋 Mes Examens")
 
+    # Split exam (examen_salle): its students, by id, fill the salles in
+    # order, largest share first
     cur.execute("""
         SELECT
             m.nom,
@@ -101,13 +103,23 @@ try:
             p.nom
         FROM examen e
         JOIN module m ON e.id_module = m.id_module
-        JOIN salle s ON e.id_salle = s.id_salle
         JOIN creneau c ON e.id_creneau = c.id_creneau
         JOIN professeur p ON e.id_prof = p.id_prof
-        JOIN inscription i ON i.id_module = e.id_module
+        JOIN (
+            SELECT id_module, id_etud,
+                   ROW_NUMBER() OVER (PARTITION BY id_module ORDER BY id_etud) AS rang
+            FROM inscription
+            WHERE id_module IN (SELECT id_module FROM inscription WHERE id_etud = %s)
+        ) i ON i.id_module = e.id_module
+        LEFT JOIN (
+            SELECT id_examen, id_salle, nb_places,
+                   SUM(nb_places) OVER (PARTITION BY id_examen ORDER BY nb_places DESC, id_salle) AS cumul
+            FROM examen_salle
+        ) es ON es.id_examen = e.id_examen AND i.rang > es.cumul - es.nb_places AND i.rang <= es.cumul
+        JOIN salle s ON s.id_salle = COALESCE(es.id_salle, e.id_salle)
         WHERE i.id_etud = %s
         ORDER BY c.date_exam, c.heure_debut
-    """, (etudiant_id,))
+    """, (etudiant_id, etudiant_id))
 
     exams = cur.fetchall()
 
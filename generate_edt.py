@@ -1,6 +1,17 @@
 import psycopg2
-from collections import defaultdict
+from psycopg2.extras import execute_values
+import os
 import random
+import time
+
+import numpy as np
+
+from enrollment import Enrollment
+from invigilation import assign_invigilators, save_invigilators
+from multistart import run_multistart
+from optimizer import METHODS, UNPLACED_WEIGHT, ScheduleState
+from prof_index import MAX_PER_DAY, ProfIndex
+from rooms import RoomIndex, utilisation
 
 # ==============================
 # 1️⃣ Connexion PostgreSQL
@@ -14,170 +25,309 @@ def get_connection():
         port="5432"
     )
 
-conn = get_connection()
-cur = conn.cursor()
-
 # ==============================
 # 2️⃣ Récupération des données
 # ==============================
+def charger_donnees(cur):
+    """Charge examens, salles, profs et inscriptions en mémoire (lecture seule ensuite)."""
+
+    # Examens (sans nb_etudiants)
+    cur.execute("""
+        SELECT id_examen, id_module
+        FROM examen
+    """)
+    examens = cur.fetchall()
+
+    # Salles
+    cur.execute("SELECT id_salle, capacite FROM salle")
+    salles = cur.fetchall()
+
+    # Professeurs (CORRIGÉ)
+    cur.execute("SELECT id_prof, id_dept FROM professeur")
+    profs = cur.fetchall()
 
-# Examens (sans nb_etudiants)
-cur.execute("""
-    SELECT id_examen, id_module
-    FROM examen
-""")
-examens = cur.fetchall()
-
-# Salles
-cur.execute("SELECT id_salle, capacite FROM salle")
-salles = cur.fetchall()
-
-# Professeurs (CORRIGÉ)
-cur.execute("SELECT id_prof, id_dept FROM professeur")
-profs = cur.fetchall()
-
-# Inscriptions
-cur.execute("SELECT id_etud, id_module FROM inscription")
-inscriptions = cur.fetchall()
-
-# Nombre d'étudiants par module (CORRIGÉ)
-cur.execute("""
-    SELECT id_module, COUNT(id_etud)
-    FROM inscription
-    GROUP BY id_module
-""")
-nb_etudiants_par_module = dict(cur.fetchall())
-
-# Module → département (CORRIGÉ)
-cur.execute("""
-    SELECT m.id_module, f.id_dept
-    FROM module m
-    JOIN formation f ON m.id_form = f.id_form
-""")
-module_dept = dict(cur.fetchall())
+    # Créneaux (date, horaire), dans l'ordre chronologique
+    cur.execute(f"""
+        SELECT c.date_exam, {HORAIRE}
+        FROM creneau c
+        ORDER BY c.date_exam, c.heure_debut
+    """)
+    creneaux = list(dict.fromkeys(cur.fetchall()))
+
+    # Indisponibilités des professeurs, par créneau (date, horaire)
+    cur.execute(f"""
+        SELECT i.id_prof, c.date_exam, {HORAIRE}
+        FROM indisponibilite i
+        JOIN creneau c ON c.id_creneau = i.id_creneau
+    """)
+    indisponibilites = {}
+    for id_prof, date_exam, horaire in cur.fetchall():
+        indisponibilites.setdefault(id_prof, []).append((date_exam, horaire))
+
+    # Inscriptions (tableaux CSR compacts, indices d'étudiants denses)
+    cur.execute("SELECT id_module, id_etud FROM inscription")
+    inscriptions = Enrollment.from_cursor(cur)
+
+    # Nombre d'étudiants par module (compteur tenu à jour par trigger)
+    cur.execute("SELECT id_module, nb_inscrits FROM module")
+    nb_etudiants_par_module = dict(cur.fetchall())
+
+    # Module → département (CORRIGÉ)
+    cur.execute("""
+        SELECT m.id_module, f.id_dept
+        FROM module m
+        JOIN formation f ON m.id_form = f.id_form
+    """)
+    module_dept = dict(cur.fetchall())
+
+    return {
+        "examens": examens,
+        "salles": salles,
+        "creneaux": creneaux,
+        "profs": profs,
+        "indisponibilites": indisponibilites,
+        "nb_etudiants_par_module": nb_etudiants_par_module,
+        "module_dept": module_dept,
+        "inscriptions": inscriptions,
+    }
 
 # ==============================
-# 3️⃣ Créneaux et structures
+# 3️⃣ Créneaux
 # ==============================
-creneaux = ["08:30-10:00", "10:15-11:45", "12:00-13:30", "13:45-15:15"]
+# Un créneau est un couple (date_exam, "HH:MM-HH:MM") ; le libellé est
+# construit à partir des colonnes réelles de la table creneau.
+HORAIRE = "to_char(c.heure_debut, 'HH24:MI') || '-' || to_char(c.heure_fin, 'HH24:MI')"
+
 
-etudiant_jour = defaultdict(set)
-prof_jour = defaultdict(set)
-salle_creneau = defaultdict(set)
+def jours(creneaux):
+    """créneau -> jour, pour la limite de MAX_PER_DAY examens par prof et par jour."""
+    return {c: c[0] for c in creneaux}
 
-planning = []
-surveillance_data = []
+
+def grille(creneaux):
+    """créneau -> (jour, rang dans la journée), pour les coûts souples (cost_model)."""
+    rang, dernier, grid = 0, None, {}
+    for c in creneaux:
+        rang = rang + 1 if c[0] == dernier else 0
+        dernier = c[0]
+        grid[c] = (c[0].toordinal(), rang)
+    return grid
 
 # ==============================
 # 4️⃣ Génération gloutonne
 # ==============================
-for id_examen, id_module in examens:
-    placed = False
-    nb_etudiants = nb_etudiants_par_module.get(id_module, 0)
+def generer_planning(donnees, seed=None):
+    """Planning glouton (id_examen, creneau, [(id_salle, nb_places)], id_prof) ; `seed`
+    départage les profs à charge égale. Une cohorte trop grande pour une salle
+    est répartie sur plusieurs (RoomIndex.pack)."""
+    rnd = random.Random(seed)
+    creneaux = donnees["creneaux"]
+    # au plus MAX_PER_DAY examens par prof et par jour (règle du trigger), hors indisponibilités
+    profs = ProfIndex(donnees["profs"], creneaux, rnd, days=jours(creneaux),
+                      unavailable=donnees["indisponibilites"])
+    salles = RoomIndex(donnees["salles"])
+    module_dept = donnees["module_dept"]
+    inscriptions = donnees["inscriptions"]
 
-    for c in creneaux:
+    # Occupation étudiante par jour (un seul examen par étudiant et par jour,
+    # règle du trigger) : un booléen par étudiant
+    occupation = {c[0]: np.zeros(inscriptions.n_students, dtype=bool) for c in creneaux}
+
+    planning = []
+
+    for id_examen, id_module in donnees["examens"]:
+        nb_etudiants = donnees["nb_etudiants_par_module"].get(id_module, 0)
+        etudiants = inscriptions.students(id_module)
+
+        for c in creneaux:
+
+            # ----- Salle (la plus petite qui convient, sinon plusieurs) -----
+            repartition = salles.pack(c, nb_etudiants)
+            if repartition is None:
+                continue
 
-        # ----- Salle -----
-        salle_id = None
-        for sid, capacite in salles:
-            if c not in salle_creneau[sid] and nb_etudiants <= capacite:
-                salle_id = sid
-                break
-        if salle_id is None:
-            continue
-
-        # ----- Professeur -----
-        prof_id = None
-        random.shuffle(profs)
-        for pid, dept_id in profs:
-            if (
-                c not in prof_jour[pid]
-                and dept_id == module_dept.get(id_module)
-            ):
-                prof_id = pid
-                break
-        if prof_id is None:
-            continue
-
-        # ----- Conflit étudiant -----
-        conflict = False
-        for etud_id, mod in inscriptions:
-            if mod == id_module and c in etudiant_jour[etud_id]:
-                conflict = True
-                break
-        if conflict:
-            continue
-
-        # ----- Placement -----
-        planning.append((id_examen, c, salle_id, prof_id))
-        salle_creneau[salle_id].add(c)
-        prof_jour[prof_id].add(c)
-
-        for etud_id, mod in inscriptions:
-            if mod == id_module:
-                etudiant_jour[etud_id].add(c)
-
-        surveillance_data.append((id_examen, prof_id))
-        placed = True
-        break
-
-    if not placed:
-        print(f"⚠️ Impossible de placer l'examen {id_examen}")
+            # ----- Professeur (le moins chargé du département, disponible) -----
+            prof_id = profs.pick(module_dept.get(id_module), c)
+            if prof_id is None:
+                continue
+
+            # ----- Conflit étudiant ce jour-là (un seul test vectorisé) -----
+            if occupation[c[0]][etudiants].any():
+                continue
+
+            # ----- Placement -----
+            planning.append((id_examen, c, repartition, prof_id))
+            for salle_id, _ in repartition:
+                salles.take(c, salle_id)
+            profs.assign(prof_id, c)
+            occupation[c[0]][etudiants] = True
+            break
+
+    return planning
 
 # ==============================
-# 5️⃣ Optimisation locale (SAFE)
+# 5️⃣ Optimisation (recuit simulé / tabou)
 # ==============================
-def calcul_score(pl):
-    score = 0
-    etud_tmp = defaultdict(set)
-
-    for id_exam, c, _, _ in pl:
-        for etud_id, mod in inscriptions:
-            if mod == id_exam:
-                if c in etud_tmp[etud_id]:
-                    score += 10
-                else:
-                    etud_tmp[etud_id].add(c)
-    return score
-
-if len(planning) >= 2:
-    score = calcul_score(planning)
-
-    for _ in range(300):
-        a, b = random.sample(range(len(planning)), 2)
-        planning[a], planning[b] = planning[b], planning[a]
-        new_score = calcul_score(planning)
-
-        if new_score <= score:
-            score = new_score
-        else:
-            planning[a], planning[b] = planning[b], planning[a]
+# Budget en secondes ; on garde toujours le meilleur planning trouvé.
+METHODE_OPTIMISATION = "anneal"
+BUDGET_OPTIMISATION = 10.0
+NB_DEPARTS = os.cpu_count() or 1
+
+
+def _etat(donnees, planning):
+    """État pour l'optimiseur ; les examens répartis sur plusieurs salles ne bougent pas."""
+    module_examen = dict(donnees["examens"])
+    prof_examen = {id_exam: prof_id for id_exam, _, _, prof_id in planning}
+    return ScheduleState(
+        {id_exam: (c, repartition[0][0]) for id_exam, c, repartition, _ in planning},
+        {e: donnees["inscriptions"].students(module_examen[e]) for e in prof_examen},
+        {e: donnees["nb_etudiants_par_module"].get(module_examen[e], 0) for e in prof_examen},
+        dict(donnees["salles"]),
+        donnees["creneaux"],
+        groups=prof_examen,
+        frozen={
+            id_exam: [salle_id for salle_id, _ in repartition[1:]]
+            for id_exam, _, repartition, _ in planning if len(repartition) > 1
+        },
+        days=jours(donnees["creneaux"]),
+        max_per_day=MAX_PER_DAY,
+        unavailable=donnees["indisponibilites"],
+        grid=grille(donnees["creneaux"])
+    )
+
+
+def score_planning(donnees, planning):
+    """Objectif commun : conflits étudiants + examens non placés."""
+    non_places = len(donnees["examens"]) - len(planning)
+    return _etat(donnees, planning).cost + UNPLACED_WEIGHT * non_places
+
+
+def optimiser_planning(donnees, planning, budget=BUDGET_OPTIMISATION, seed=None):
+    if len(planning) < 2 or budget <= 0:
+        return planning, None
+    meilleur, stats = METHODS[METHODE_OPTIMISATION](_etat(donnees, planning), budget=budget, seed=seed)
+    return [
+        (e, meilleur[e][0], repartition if len(repartition) > 1 else [(meilleur[e][1], repartition[0][1])], p)
+        for e, _, repartition, p in planning
+    ], stats
+
+
+def planning_depart(donnees, seed, budget):
+    """Un départ du multi-start : glouton tiré au sort puis optimisation."""
+    planning, _ = optimiser_planning(donnees, generer_planning(donnees, seed), budget, seed)
+    return planning
 
 # ==============================
-# 6️⃣ Insertion en base
+# 6️⃣ Surveillances (étape séparée, après créneaux et salles)
 # ==============================
-for id_examen, creneau, salle_id, prof_id in planning:
-    cur.execute("""
-        UPDATE examen
-        SET id_salle = %s,
-            id_prof = %s,
-            id_creneau = (
-                SELECT id_creneau
-                FROM creneau
-                WHERE horaire = %s
-            )
-        WHERE id_examen = %s
-    """, (salle_id, prof_id, creneau, id_examen))
-
-for id_examen, id_prof in surveillance_data:
-    cur.execute("""
-        INSERT INTO surveillance (id_examen, id_prof)
-        VALUES (%s, %s)
-        ON CONFLICT DO NOTHING
-    """, (id_examen, id_prof))
+def affecter_surveillants(donnees, planning):
+    """Surveillants par salle, charge équilibrée entre professeurs (voir invigilation.py)."""
+    module_examen = dict(donnees["examens"])
+    return assign_invigilators(
+        ((e, c, [s for s, _ in repartition], donnees["module_dept"].get(module_examen[e]))
+         for e, c, repartition, _ in planning),
+        donnees["profs"],
+        donnees["creneaux"],
+        days=jours(donnees["creneaux"]),
+        unavailable=donnees["indisponibilites"],
+        busy=[(p, c) for _, c, _, p in planning]
+    )
+
+# ==============================
+# 7️⃣ Insertion en base
+# ==============================
+def enregistrer_planning(cur, planning, surveillances):
+    """Écrit planning et surveillances en une requête par table (même transaction).
+
+    Les salles des examens répartis vont dans examen_salle avant la mise à
+    jour d'examen, pour que le trigger de capacité les compte toutes."""
+    # (date, horaire) → id_creneau, résolus une seule fois ; plusieurs jours
+    # partagent les mêmes horaires, la date fait partie de la clé
+    voulus = {c for _, c, _, _ in planning}
+    cur.execute(f"""
+        SELECT c.date_exam, {HORAIRE}, c.id_creneau
+        FROM creneau c
+        WHERE c.date_exam = ANY(%s)
+        ORDER BY c.id_creneau DESC
+    """, (sorted({date_exam for date_exam, _ in voulus}),))
+    id_creneau = {(date_exam, horaire): cid for date_exam, horaire, cid in cur.fetchall()}
+    manquants = voulus - id_creneau.keys()
+    if manquants:
+        raise ValueError("Créneau(x) introuvable(s) dans la table creneau : "
+                         + ", ".join(f"{d} {h}" for d, h in sorted(manquants)))
+
+    cur.execute("DELETE FROM examen_salle WHERE id_examen = ANY(%s)", ([p[0] for p in planning],))
+    execute_values(cur, "INSERT INTO examen_salle (id_examen, id_salle, nb_places) VALUES %s", [
+        (id_examen, salle_id, nb_places)
+        for id_examen, _, repartition, _ in planning if len(repartition) > 1
+        for salle_id, nb_places in repartition
+    ])
+
+    execute_values(cur, """
+        UPDATE examen AS e
+        SET id_salle = v.id_salle,
+            id_prof = v.id_prof,
+            id_creneau = v.id_creneau
+        FROM (VALUES %s) AS v(id_examen, id_salle, id_prof, id_creneau)
+        WHERE e.id_examen = v.id_examen
+    """, [
+        (id_examen, repartition[0][0], prof_id, id_creneau[creneau])
+        for id_examen, creneau, repartition, prof_id in planning
+    ], template="(%s, %s, %s, %s::integer)", page_size=max(len(planning), 1))
+
+    save_invigilators(cur, [p[0] for p in planning], surveillances)
+
+
+def main():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    donnees = charger_donnees(cur)
+    rapport = donnees["inscriptions"].report()
+    print(f"📥 {rapport['inscriptions']} inscriptions chargées en {rapport['load_seconds']:.2f} s "
+          f"({rapport['memory_bytes'] / 1e6:.1f} Mo)")
+
+    if NB_DEPARTS > 1:
+        planning, stats = run_multistart(
+            donnees, planning_depart, score_planning,
+            runs=NB_DEPARTS, budget=BUDGET_OPTIMISATION
+        )
+        print(f"🔁 {stats['runs']} départs en parallèle : meilleur score {stats['best_score']} "
+              f"(graine {stats['best_seed']}, pire {stats['worst_score']})")
+    else:
+        planning, stats = optimiser_planning(donnees, generer_planning(donnees))
+        if stats:
+            print(f"🔧 Optimisation : coût {stats['initial_cost']} → {stats['best_cost']} "
+                  f"({stats['iterations']} itérations, arrêt : {stats['stopped']})")
+
+    capacite = dict(donnees["salles"])
+    taux = utilisation(
+        (nb_places, capacite[s])
+        for _, _, repartition, _ in planning
+        for s, nb_places in repartition
+    )
+    print(f"🏫 Taux de remplissage des salles : {taux:.0%}")
+
+    places = {p[0] for p in planning}
+    for id_examen, _ in donnees["examens"]:
+        if id_examen not in places:
+            print(f"⚠️ Impossible de placer l'examen {id_examen}")
+
+    surveillances, stats = affecter_surveillants(donnees, planning)
+    print(f"👀 {stats['assigned']} surveillances (charge {stats['min_load']}–{stats['max_load']} par surveillant)")
+    if stats["missing"]:
+        print(f"⚠️ {stats['missing']} poste(s) de surveillance sans professeur disponible du département "
+              f"(examens {', '.join(map(str, stats['understaffed']))})")
+
+    debut = time.perf_counter()
+    enregistrer_planning(cur, planning, surveillances)
+    conn.commit()
+    print(f"💾 Écriture en base : {time.perf_counter() - debut:.2f} s")
+    cur.close()
+    conn.close()
+
+    print("✅ Planning généré et enregistré avec succès !")
 
-conn.commit()
-cur.close()
-conn.close()
 
-print("✅ Planning généré et enregistré avec succès !")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,7 @@ def init_database():
         print("🔄 Création des tables...")
         
         # Drop tables if exist (for clean slate)
-        tables = ['inscription', 'surveillance', 'examen', 'creneau', 'module', 'etudiant', 'professeur', 'salle', 'formation', 'departement']
+        tables = ['student_day_load', 'inscription', 'surveillance', 'indisponibilite', 'examen_salle', 'examen', 'creneau', 'module', 'etudiant', 'professeur', 'salle', 'formation', 'departement']
         for table in tables:
             try:
                 cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE;")
@@ -81,7 +81,8 @@ def init_database():
                 nom TEXT NOT NULL,
                 credits INTEGER DEFAULT 3,
                 id_form INTEGER REFERENCES formation(id_form),
-                pre_req_id INTEGER REFERENCES module(id_module)
+                pre_req_id INTEGER REFERENCES module(id_module),
+                nb_inscrits INTEGER NOT NULL DEFAULT 0
             );
         """)
         
@@ -128,6 +129,15 @@ def init_database():
             );
         """)
         
+        cur.execute("""
+            CREATE TABLE examen_salle (
+                id_examen INTEGER REFERENCES examen(id_examen) ON DELETE CASCADE,
+                id_salle INTEGER REFERENCES salle(id_salle),
+                nb_places INTEGER NOT NULL,
+                PRIMARY KEY (id_examen, id_salle)
+            );
+        """)
+        
         cur.execute("""
             CREATE TABLE surveillance (
                 id_surv SERIAL PRIMARY KEY,
@@ -136,12 +146,190 @@ def init_database():
             );
         """)
         
+        cur.execute("""
+            CREATE TABLE indisponibilite (
+                id_prof INTEGER REFERENCES professeur(id_prof) ON DELETE CASCADE,
+                id_creneau INTEGER REFERENCES creneau(id_creneau) ON DELETE CASCADE,
+                PRIMARY KEY (id_prof, id_creneau)
+            );
+        """)
+        
+        cur.execute("""
+            CREATE TABLE student_day_load (
+                id_etud INTEGER REFERENCES etudiant(id_etud) ON DELETE CASCADE,
+                date_exam DATE NOT NULL,
+                nb_examens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (id_etud, date_exam)
+            );
+        """)
+        
         # Create indexes
         cur.execute("CREATE INDEX IF NOT EXISTS idx_inscription_module ON inscription(id_module);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_inscription_etud ON inscription(id_etud);")
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_examen_module ON examen(id_module);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_examen_prof ON examen(id_prof);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_examen_creneau ON examen(id_creneau);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_creneau_date ON creneau(date_exam);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_student_day_load_conflicts ON student_day_load(date_exam) WHERE nb_examens > 1;")
+        
+        # module.nb_inscrits maintenu par triggers sur inscription
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION fn_module_nb_inscrits()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    UPDATE module m
+                    SET nb_inscrits = m.nb_inscrits + d.nb
+                    FROM (SELECT id_module, COUNT(*) AS nb FROM new_rows GROUP BY id_module) d
+                    WHERE m.id_module = d.id_module;
+                END IF;
+                IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                    UPDATE module m
+                    SET nb_inscrits = m.nb_inscrits - d.nb
+                    FROM (SELECT id_module, COUNT(*) AS nb FROM old_rows GROUP BY id_module) d
+                    WHERE m.id_module = d.id_module;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_inscription_count_insert
+            AFTER INSERT ON inscription
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_module_nb_inscrits();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_inscription_count_delete
+            AFTER DELETE ON inscription
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_module_nb_inscrits();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_inscription_count_update
+            AFTER UPDATE ON inscription
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_module_nb_inscrits();
+        """)
+        
+        # student_day_load (examens par étudiant et par jour) maintenu par
+        # triggers sur examen et inscription
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION fn_student_day_load_examen()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    UPDATE student_day_load l
+                    SET nb_examens = l.nb_examens - d.nb
+                    FROM (
+                        SELECT i.id_etud, c.date_exam, COUNT(*) AS nb
+                        FROM old_rows o
+                        JOIN creneau c ON c.id_creneau = o.id_creneau
+                        JOIN inscription i ON i.id_module = o.id_module
+                        GROUP BY i.id_etud, c.date_exam
+                    ) d
+                    WHERE l.id_etud = d.id_etud AND l.date_exam = d.date_exam;
+                ELSIF TG_OP = 'INSERT' THEN
+                    INSERT INTO student_day_load AS l (id_etud, date_exam, nb_examens)
+                    SELECT i.id_etud, c.date_exam, COUNT(*)
+                    FROM new_rows n
+                    JOIN creneau c ON c.id_creneau = n.id_creneau
+                    JOIN inscription i ON i.id_module = n.id_module
+                    GROUP BY i.id_etud, c.date_exam
+                    ON CONFLICT (id_etud, date_exam) DO UPDATE SET nb_examens = l.nb_examens + EXCLUDED.nb_examens;
+                ELSE
+                    -- UPDATE: only rows whose module or creneau changed move the load
+                    UPDATE student_day_load l
+                    SET nb_examens = l.nb_examens - d.nb
+                    FROM (
+                        SELECT i.id_etud, c.date_exam, COUNT(*) AS nb
+                        FROM old_rows o
+                        JOIN new_rows n ON n.id_examen = o.id_examen
+                        JOIN creneau c ON c.id_creneau = o.id_creneau
+                        JOIN inscription i ON i.id_module = o.id_module
+                        WHERE (o.id_module, o.id_creneau) IS DISTINCT FROM (n.id_module, n.id_creneau)
+                        GROUP BY i.id_etud, c.date_exam
+                    ) d
+                    WHERE l.id_etud = d.id_etud AND l.date_exam = d.date_exam;
+                    INSERT INTO student_day_load AS l (id_etud, date_exam, nb_examens)
+                    SELECT i.id_etud, c.date_exam, COUNT(*)
+                    FROM new_rows n
+                    JOIN old_rows o ON o.id_examen = n.id_examen
+                    JOIN creneau c ON c.id_creneau = n.id_creneau
+                    JOIN inscription i ON i.id_module = n.id_module
+                    WHERE (o.id_module, o.id_creneau) IS DISTINCT FROM (n.id_module, n.id_creneau)
+                    GROUP BY i.id_etud, c.date_exam
+                    ON CONFLICT (id_etud, date_exam) DO UPDATE SET nb_examens = l.nb_examens + EXCLUDED.nb_examens;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION fn_student_day_load_inscription()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                    UPDATE student_day_load l
+                    SET nb_examens = l.nb_examens - d.nb
+                    FROM (
+                        SELECT o.id_etud, c.date_exam, COUNT(*) AS nb
+                        FROM old_rows o
+                        JOIN examen e ON e.id_module = o.id_module
+                        JOIN creneau c ON c.id_creneau = e.id_creneau
+                        GROUP BY o.id_etud, c.date_exam
+                    ) d
+                    WHERE l.id_etud = d.id_etud AND l.date_exam = d.date_exam;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO student_day_load AS l (id_etud, date_exam, nb_examens)
+                    SELECT n.id_etud, c.date_exam, COUNT(*)
+                    FROM new_rows n
+                    JOIN examen e ON e.id_module = n.id_module
+                    JOIN creneau c ON c.id_creneau = e.id_creneau
+                    GROUP BY n.id_etud, c.date_exam
+                    ON CONFLICT (id_etud, date_exam) DO UPDATE SET nb_examens = l.nb_examens + EXCLUDED.nb_examens;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_examen_day_load_insert
+            AFTER INSERT ON examen
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_examen();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_examen_day_load_delete
+            AFTER DELETE ON examen
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_examen();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_examen_day_load_update
+            AFTER UPDATE ON examen
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_examen();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_inscription_day_load_insert
+            AFTER INSERT ON inscription
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_inscription();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_inscription_day_load_delete
+            AFTER DELETE ON inscription
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_inscription();
+        """)
+        cur.execute("""
+            CREATE TRIGGER trg_inscription_day_load_update
+            AFTER UPDATE ON inscription
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_student_day_load_inscription();
+        """)
         
         conn.commit()
         print("✅ Tables créées avec succès!")
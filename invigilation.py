@@ -0,0 +1,99 @@
+"""Invigilator (surveillance) assignment, run once creneaux and salles are fixed.
+
+Each creneau is an assignment problem solved exactly with
+scipy.optimize.linear_sum_assignment: rows are supervisor seats (`per_room`
+per salle used), columns are professors still free at that creneau (per-day
+limit and unavailability come from ProfIndex). A seat costs the professor's
+current load, so going through the creneaux in order spreads supervision
+evenly across staff. Professors only supervise exams of their own
+department: other pairs get a FORBIDDEN cost and are dropped from the
+solution, the seat staying empty, unless a `dept_penalty` is given.
+"""
+import numpy as np
+from psycopg2.extras import execute_values
+from scipy.optimize import linear_sum_assignment
+
+from prof_index import MAX_PER_DAY, ProfIndex
+
+
+SURVEILLANTS_PAR_SALLE = 2
+FORBIDDEN = 1e9
+
+
+def assign_invigilators(exams, profs, creneaux, per_room=SURVEILLANTS_PAR_SALLE, days=None,
+                        max_per_day=MAX_PER_DAY, unavailable=None, busy=(), dept_penalty=None):
+    """Supervisors for scheduled exams.
+
+    `exams` is an iterable of (id_examen, creneau, [id_salle, ...], id_dept),
+    `profs` of (id_prof, id_dept). `busy` lists (id_prof, creneau) already
+    taken, e.g. each exam's responsible professor. An exam with no
+    department takes professors of any department. With a `dept_penalty`,
+    seats no professor of the department can take go to other departments
+    at that extra cost instead of staying empty.
+    Returns (rows [(id_examen, id_prof)], stats): `missing` empty seats,
+    `understaffed` the exams they belong to, and `min_load`/`max_load` the
+    supervisions per professor among those given at least one.
+    """
+    profs = list(profs)
+    staff = ProfIndex(profs, creneaux, days=days, max_per_day=max_per_day, unavailable=unavailable)
+    for pid, c in busy:
+        if pid in staff.busy and c in staff.bit:
+            staff.assign(pid, c)
+
+    seats_by_creneau = {}
+    for id_examen, c, salles, dept_id in exams:
+        seats = seats_by_creneau.setdefault(c, [])
+        for _ in range(len(salles) * per_room):
+            seats.append((id_examen, dept_id))
+
+    prof_ids = np.array([pid for pid, _ in profs])
+    prof_dept = np.array([dept_id for _, dept_id in profs], dtype=object)
+    supervisions = dict.fromkeys(prof_ids.tolist(), 0)
+    rows, missing, understaffed = [], 0, set()
+    outside = FORBIDDEN if dept_penalty is None else dept_penalty
+
+    for c in creneaux:
+        seats = seats_by_creneau.get(c)
+        if not seats:
+            continue
+        free = np.array([staff.is_free(pid, c) for pid in prof_ids.tolist()], dtype=bool)
+        candidates = prof_ids[free]
+        if not len(candidates):
+            missing += len(seats)
+            understaffed.update(id_examen for id_examen, _ in seats)
+            continue
+
+        load = np.array([staff.load[pid] for pid in candidates.tolist()], dtype=float)
+        seat_dept = np.array([dept_id for _, dept_id in seats], dtype=object)
+        has_dept = np.array([dept_id is not None for _, dept_id in seats], dtype=bool)
+        other = has_dept[:, None] & (seat_dept[:, None] != prof_dept[free][None, :])
+        cost = load[None, :] + outside * other
+        seat_idx, prof_idx = linear_sum_assignment(cost)
+        kept = cost[seat_idx, prof_idx] < FORBIDDEN
+        seat_idx, prof_idx = seat_idx[kept], prof_idx[kept]
+
+        missing += len(seats) - len(seat_idx)
+        staffed = set(seat_idx.tolist())
+        understaffed.update(seats[i][0] for i in range(len(seats)) if i not in staffed)
+        for i, j in zip(seat_idx.tolist(), prof_idx.tolist()):
+            pid = int(candidates[j])
+            rows.append((seats[i][0], pid))
+            staff.assign(pid, c)
+            supervisions[pid] += 1
+
+    counts = [n for n in supervisions.values() if n]
+    return rows, {
+        "assigned": len(rows),
+        "missing": missing,
+        "understaffed": sorted(understaffed),
+        "min_load": min(counts, default=0),
+        "max_load": max(counts, default=0),
+    }
+
+
+def save_invigilators(cur, exam_ids, rows):
+    """Replace the surveillance rows of `exam_ids` with `rows` in one bulk insert."""
+    cur.execute("DELETE FROM surveillance WHERE id_examen = ANY(%s)", (list(exam_ids),))
+    if rows:
+        execute_values(cur, "INSERT INTO surveillance (id_examen, id_prof) VALUES %s", rows,
+                       page_size=len(rows))
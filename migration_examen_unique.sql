@@ -0,0 +1,39 @@
+-- One-off migration: remove duplicate examen rows so that
+-- edt_universitaire.sql can create uq_examen_module.
+-- For each module the scheduled row is kept, then the oldest one. Every
+-- row removed is reported (NOTICE) with the surveillance and examen_salle
+-- rows that go with it (ON DELETE CASCADE).
+-- Usage: psql -d edt_universitaire -f migration_examen_unique.sql
+
+DO $$
+DECLARE
+	r RECORD;
+	v_salles INT;
+	v_surveillances INT;
+	v_total INT := 0;
+BEGIN
+	FOR r IN
+		SELECT d.id_examen, d.id_module, d.id_creneau, d.id_garde
+		FROM (
+			SELECT id_examen, id_module, id_creneau,
+			       ROW_NUMBER() OVER w AS rn,
+			       FIRST_VALUE(id_examen) OVER w AS id_garde
+			FROM examen
+			WHERE id_module IS NOT NULL
+			WINDOW w AS (PARTITION BY id_module ORDER BY id_creneau IS NULL, id_examen)
+		) d
+		WHERE d.rn > 1
+		ORDER BY d.id_module, d.id_examen
+	LOOP
+		SELECT COUNT(*) INTO v_surveillances FROM surveillance WHERE id_examen = r.id_examen;
+		v_salles := 0;
+		IF to_regclass('examen_salle') IS NOT NULL THEN
+			EXECUTE 'SELECT COUNT(*) FROM examen_salle WHERE id_examen = $1' INTO v_salles USING r.id_examen;
+		END IF;
+		RAISE NOTICE 'module %: examen % supprimé (créneau %, % surveillance(s), % salle(s)), examen % gardé',
+			r.id_module, r.id_examen, COALESCE(r.id_creneau::TEXT, 'aucun'), v_surveillances, v_salles, r.id_garde;
+		DELETE FROM examen WHERE id_examen = r.id_examen;
+		v_total := v_total + 1;
+	END LOOP;
+	RAISE NOTICE '% examen(s) en double supprimé(s)', v_total;
+END $$;
@@ -0,0 +1,195 @@
+"""Exact module -> creneau -> salle assignment as a MILP, solved by the HiGHS
+solver bundled with SciPy (scipy.optimize.milp).
+
+Meant for a department-sized instance. The model is kept small by only
+creating variables for rooms large enough for the module, by dropping
+days already taken by fixed neighbours, and by writing student conflicts
+(one exam per student per day, as in the examen trigger) as one
+constraint per clique of the conflict graph and day instead of one per
+conflicting pair.
+
+Objective: every unplaced module costs more than all creneaux together, then
+each creneau used costs 1. A placed module is therefore always worth more
+than a saved slot.
+"""
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+
+def objective(n_unplaced, n_creneaux_used, n_creneaux):
+    """Objective value of a schedule, comparable with the MILP's."""
+    return (n_creneaux + 1) * n_unplaced + n_creneaux_used
+
+
+def clique_cover(conflicts, modules):
+    """Greedy cover of every conflict edge between `modules` by cliques."""
+    members = set(modules)
+    covered = set()
+    cliques = []
+    for m in sorted(members, key=lambda k: -len(conflicts.get(k, {}))):
+        neighbours = [n for n in conflicts.get(m, {}) if n in members]
+        for n in neighbours:
+            if (m, n) in covered:
+                continue
+            clique = [m, n]
+            common = set(neighbours) & set(conflicts.get(n, {}))
+            for cand in sorted(common, key=lambda k: -len(conflicts.get(k, {}))):
+                if all(cand in conflicts.get(k, {}) for k in clique):
+                    clique.append(cand)
+            for a in clique:
+                for b in clique:
+                    covered.add((a, b))
+            cliques.append(clique)
+    return cliques
+
+
+def solve_milp(modules, sizes, conflicts, salles, creneaux, time_limit=30.0, fixed=None,
+               groups=None, days=None, max_per_day=None, unavailable=None):
+    """Assign `modules` to (creneau, salle) optimally, within `time_limit` seconds.
+
+    `sizes` maps id_module -> students, `salles` is [(id_salle, capacite)],
+    `creneaux` is [id_creneau]. `fixed` maps modules that keep their current
+    place (e.g. split over several rooms) to (id_creneau, [id_salle, ...]).
+    Conflicting modules take distinct days (`days`: id_creneau -> day;
+    distinct creneaux without it). Modules sharing a `groups` value (their
+    professor) take distinct creneaux, at most `max_per_day` per day, and
+    none of the group's `unavailable` creneaux.
+    Returns (placements {id_module: (id_creneau, id_salle)} or None, stats).
+    """
+    started = time.perf_counter()
+    fixed = fixed or {}
+    groups = groups or {}
+    days = days or {}
+    free = [m for m in modules if m not in fixed]
+    slot_pos = {c: i for i, c in enumerate(creneaux)}
+    day_of = {c: days.get(c, c) for c in creneaux}
+
+    # creneaux each group lost to unavailability or to its fixed modules,
+    # and what the fixed modules already use of its day quotas
+    group_barred = {(g, c) for g, cs in (unavailable or {}).items() for c in cs}
+    group_day_used = {}
+    for f, (c, _) in fixed.items():
+        if f in groups:
+            group_barred.add((groups[f], c))
+            key = (groups[f], days.get(c))
+            group_day_used[key] = group_day_used.get(key, 0) + 1
+
+    blocked_rooms = {(c, sid) for c, sids in fixed.values() for sid in sids}
+    blocked_days = {}
+    for f, (c, _) in fixed.items():
+        for n in conflicts.get(f, {}):
+            blocked_days.setdefault(n, set()).add(days.get(c, c))
+
+    # x[m, c, s] only where the room fits and nothing fixed forbids it
+    xvars = []
+    by_module, by_room_slot, by_module_slot = {}, {}, {}
+    for m in free:
+        rooms = [sid for sid, cap in salles if cap is None or sizes.get(m, 0) <= cap]
+        for c in creneaux:
+            if day_of[c] in blocked_days.get(m, ()) or (groups.get(m), c) in group_barred:
+                continue
+            for sid in rooms:
+                if (c, sid) in blocked_rooms:
+                    continue
+                k = len(xvars)
+                xvars.append((m, c, sid))
+                by_module.setdefault(m, []).append(k)
+                by_room_slot.setdefault((c, sid), []).append(k)
+                by_module_slot.setdefault((m, c), []).append(k)
+
+    n_x, n_m, n_s = len(xvars), len(free), len(creneaux)
+    u0, y0 = n_x, n_x + n_m
+    n_vars = n_x + n_m + n_s
+
+    rows, cols, vals, lower, upper = [], [], [], [], []
+
+    def add_row(var_ids, lb, ub, extra=()):
+        r = len(lower)
+        rows.extend([r] * (len(var_ids) + len(extra)))
+        cols.extend(var_ids)
+        vals.extend([1.0] * len(var_ids))
+        for v, coef in extra:
+            cols.append(v)
+            vals.append(coef)
+        lower.append(lb)
+        upper.append(ub)
+
+    # each module placed once or left unplaced
+    for i, m in enumerate(free):
+        add_row(by_module.get(m, []) + [u0 + i], 1, 1)
+    # one exam per room and creneau
+    for ks in by_room_slot.values():
+        if len(ks) > 1:
+            add_row(ks, 0, 1)
+    # conflict cliques: at most one of them per day
+    cliques = clique_cover(conflicts, free)
+    creneaux_of_day = {}
+    for c in creneaux:
+        creneaux_of_day.setdefault(day_of[c], []).append(c)
+    for clique in cliques:
+        for day_creneaux in creneaux_of_day.values():
+            ks = [k for m in clique for c in day_creneaux for k in by_module_slot.get((m, c), [])]
+            if len(ks) > 1:
+                add_row(ks, 0, 1)
+    # professors: one exam per creneau, at most max_per_day per day
+    by_group_slot, by_group_day = {}, {}
+    for (m, c), ks in by_module_slot.items():
+        if m in groups:
+            by_group_slot.setdefault((groups[m], c), []).extend(ks)
+            by_group_day.setdefault((groups[m], days.get(c)), []).extend(ks)
+    for ks in by_group_slot.values():
+        if len(ks) > 1:
+            add_row(ks, 0, 1)
+    if max_per_day is not None:
+        for key, ks in by_group_day.items():
+            quota = max(0, max_per_day - group_day_used.get(key, 0))
+            if len(ks) > quota:
+                add_row(ks, 0, quota)
+    # a creneau holding a module counts as used
+    for (m, c), ks in by_module_slot.items():
+        add_row(ks, -np.inf, 0, extra=[(y0 + slot_pos[c], -1.0)])
+
+    cost = np.zeros(n_vars)
+    cost[u0:y0] = n_s + 1
+    cost[y0:] = 1
+    lb = np.zeros(n_vars)
+    for c, _ in fixed.values():
+        lb[y0 + slot_pos[c]] = 1  # already used by a fixed module
+
+    constraints = []
+    if lower:
+        matrix = sparse.csr_matrix((vals, (rows, cols)), shape=(len(lower), n_vars))
+        constraints.append(LinearConstraint(matrix, lower, upper))
+
+    res = milp(
+        cost,
+        constraints=constraints,
+        integrality=np.ones(n_vars),
+        bounds=Bounds(lb, np.ones(n_vars)),
+        options={"time_limit": time_limit, "disp": False},
+    )
+
+    stats = {
+        "status": res.message,
+        "optimal": res.status == 0,
+        "variables": n_vars,
+        "constraints": len(lower),
+        "cliques": len(cliques),
+        "objective": None,
+        "dual_bound": getattr(res, "mip_dual_bound", None),
+        "gap": getattr(res, "mip_gap", None),
+    }
+    if res.x is None:
+        stats["elapsed"] = time.perf_counter() - started
+        return None, stats
+
+    placements = {}
+    for k in np.flatnonzero(res.x[:n_x] > 0.5):
+        m, c, sid = xvars[k]
+        placements[m] = (c, sid)
+    stats["objective"] = float(round(res.fun))
+    stats["elapsed"] = time.perf_counter() - started
+    return placements, stats
@@ -0,0 +1,46 @@
+"""Multi-start scheduling: N seeded runs in a process pool, best result kept.
+
+The problem snapshot is sent once to each worker process (pool initializer)
+and then only read, so runs differ by their seed alone.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+_snapshot = None
+
+
+def _init_worker(snapshot):
+    global _snapshot
+    _snapshot = snapshot
+
+
+def _run(solve, score, seed, budget):
+    result = solve(_snapshot, seed, budget)
+    return seed, score(_snapshot, result), result
+
+
+def run_multistart(snapshot, solve, score, runs=None, workers=None, budget=0.0, base_seed=0):
+    """Run `solve(snapshot, seed, budget)` for `runs` seeds across `workers` processes.
+
+    `solve` and `score(snapshot, result)` must be module-level functions (or
+    functools.partial of one) so they can be pickled. Lower scores are better.
+    Returns (best_result, stats).
+    """
+    workers = workers or os.cpu_count() or 1
+    runs = runs or workers
+    seeds = list(range(base_seed, base_seed + runs))
+
+    with ProcessPoolExecutor(max_workers=min(workers, runs),
+                             initializer=_init_worker, initargs=(snapshot,)) as pool:
+        results = list(pool.map(_run, [solve] * runs, [score] * runs, seeds, [budget] * runs))
+
+    best_seed, best_score, best = min(results, key=lambda r: r[1])
+    return best, {
+        "runs": runs,
+        "workers": min(workers, runs),
+        "best_seed": best_seed,
+        "best_score": best_score,
+        "worst_score": max(r[1] for r in results),
+        "scores": {seed: sc for seed, sc, _ in results},
+    }
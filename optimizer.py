@@ -0,0 +1,320 @@
+"""Time-budgeted metaheuristics (simulated annealing, tabu search) that
+improve an existing schedule.
+
+Both work on a ScheduleState: exam key -> (creneau, salle) or None when the
+exam is not placed. They return the best assignment seen, so stopping at any
+point (budget, convergence) still yields the best result so far. "Best" ranks
+student clashes first, then unplaced exams, so neither is ever traded for
+extra placed exams or better-spread ones.
+"""
+import math
+import random
+import time
+
+from cost_model import CLASH_WEIGHT, IncrementalCost, SoftCost
+
+
+UNPLACED_WEIGHT = CLASH_WEIGHT // 2
+
+
+class ScheduleState:
+    """Placements plus the bookkeeping needed to evaluate moves in O(move).
+
+    `students_of` and `size` are keyed like `assignment`; `capacities` maps
+    salle -> capacite. Keys sharing a `groups` value (e.g. the same
+    professor) may never share a creneau, nor exceed `max_per_day` creneaux
+    of the same day (`days` maps creneau -> day), nor take a creneau listed
+    for them in `unavailable` (group -> creneaux). A student with two exams
+    on one day (one creneau without `days`) is a clash, as in the examen
+    trigger. With a `conflicts` graph (key -> conflicting keys) unplaced
+    exams can also be inserted by evicting their neighbours from the target
+    day. `frozen` maps keys that must not move
+    (exams split over several rooms) to the extra salles they also occupy.
+    With a `grid` (creneau -> (day, slot)) the soft constraints `soft_terms`
+    (cost_model.SOFT_TERMS by default) are part of the cost.
+    """
+
+    def __init__(self, assignment, students_of, size, capacities, creneaux,
+                 groups=None, conflicts=None, frozen=None, days=None, max_per_day=None,
+                 unavailable=None, grid=None, soft_terms=None):
+        self.assignment = dict(assignment)
+        self.size = size
+        self.capacities = capacities
+        self.salles = list(capacities)
+        self.creneaux = list(creneaux)
+        self.groups = groups or {}
+        self.days = days or {}
+        self.max_per_day = max_per_day
+        self.unavailable = {(g, c) for g, cs in (unavailable or {}).items() for c in cs}
+        self.conflicts = conflicts
+        self.keys = list(self.assignment)
+
+        self.room_used = {}  # (creneau, salle) -> key
+        self.group_used = set()  # (group, creneau)
+        self.group_day = {}  # (group, day) -> creneaux taken
+        self.by_day = {}  # day -> set of keys
+        self.unplaced_keys = set()
+        for key, placement in self.assignment.items():
+            if placement is None:
+                self.unplaced_keys.add(key)
+            else:
+                self._book(key, placement)
+        self.frozen = frozen or {}
+        for key, extra in self.frozen.items():
+            for salle in extra:
+                self.room_used[(self.assignment[key][0], salle)] = key
+        self.keys = [key for key in self.keys if key not in self.frozen]
+
+        self.clashes = IncrementalCost(
+            {key: self._day(p) for key, p in self.assignment.items()},
+            students_of
+        )
+        self.soft = None
+        if grid is not None:
+            self.soft = SoftCost(self.assignment, students_of, grid, soft_terms)
+
+    def _day(self, placement):
+        return None if placement is None else self.days.get(placement[0], placement[0])
+
+    def _book(self, key, placement):
+        self.room_used[placement] = key
+        self.by_day.setdefault(self._day(placement), set()).add(key)
+        self.unplaced_keys.discard(key)
+        if key in self.groups:
+            self.group_used.add((self.groups[key], placement[0]))
+            day = (self.groups[key], self.days.get(placement[0]))
+            self.group_day[day] = self.group_day.get(day, 0) + 1
+
+    def _unbook(self, key, placement):
+        self.room_used.pop(placement, None)
+        self.by_day[self._day(placement)].discard(key)
+        self.unplaced_keys.add(key)
+        if key in self.groups:
+            self.group_used.discard((self.groups[key], placement[0]))
+            self.group_day[(self.groups[key], self.days.get(placement[0]))] -= 1
+
+    @property
+    def unplaced(self):
+        return len(self.unplaced_keys)
+
+    @property
+    def cost(self):
+        soft = self.soft.cost if self.soft is not None else 0
+        return self.clashes.cost + UNPLACED_WEIGHT * self.unplaced + soft
+
+    @property
+    def rank(self):
+        """Hard costs first: (clashes, unplaced exams, total cost)."""
+        return self.clashes.cost, self.unplaced, self.cost
+
+    def _barred(self, key, c):
+        """Whether `key`'s group is unavailable at creneau `c` or would exceed
+        its day limit there."""
+        g = self.groups.get(key)
+        if g is None:
+            return False
+        if (g, c) in self.unavailable:
+            return True
+        if self.max_per_day is None:
+            return False
+        day = self.days.get(c)
+        taken = self.group_day.get((g, day), 0)
+        current = self.assignment[key]
+        if current is not None and self.days.get(current[0]) == day:
+            taken -= 1
+        return taken >= self.max_per_day
+
+    def _fits(self, key, salle):
+        cap = self.capacities.get(salle)
+        return cap is None or self.size.get(key, 0) <= cap
+
+    def _insert_move(self, rnd):
+        """Place an unplaced exam in a random creneau, unplacing the exams
+        of that day that share students with it."""
+        key = rnd.choice(list(self.unplaced_keys))
+        c = rnd.choice(self.creneaux)
+        if (self.groups.get(key, None), c) in self.group_used or self._barred(key, c):
+            return None
+        neighbours = self.conflicts.get(key, {})
+        evicted = [k for k in self.by_day.get(self._day((c,)), ()) if k in neighbours]
+        if any(k in self.frozen for k in evicted):
+            return None
+
+        salle = None
+        for k in evicted:
+            if self.assignment[k][0] == c and self._fits(key, self.assignment[k][1]):
+                salle = self.assignment[k][1]
+                break
+        if salle is None:
+            salle = rnd.choice(self.salles)
+            if (c, salle) in self.room_used or not self._fits(key, salle):
+                return None
+
+        moves = {k: None for k in evicted}
+        moves[key] = (c, salle)
+        return moves
+
+    def random_move(self, rnd, insert_rate=0.3):
+        """A feasible random move {key: placement}, or None if the draw failed.
+
+        While exams are unplaced, `insert_rate` is the share of insert moves.
+        """
+        if self.conflicts is not None and self.unplaced_keys and rnd.random() < insert_rate:
+            return self._insert_move(rnd)
+        if len(self.keys) >= 2 and rnd.random() < 0.5:
+            a, b = rnd.sample(self.keys, 2)
+            pa, pb = self.assignment[a], self.assignment[b]
+            if pa is None or pb is None or pa[0] == pb[0]:
+                return None
+            if not (self._fits(a, pb[1]) and self._fits(b, pa[1])):
+                return None
+            ga, gb = self.groups.get(a), self.groups.get(b)
+            if ga != gb and ((ga, pb[0]) in self.group_used or (gb, pa[0]) in self.group_used
+                             or self._barred(a, pb[0]) or self._barred(b, pa[0])):
+                return None
+            return {a: pb, b: pa}
+
+        if not self.keys:
+            return None  # everything is frozen
+        key = rnd.choice(self.keys)
+        c = rnd.choice(self.creneaux)
+        g = self.groups.get(key)
+        current = self.assignment[key]
+        if g is not None and (g, c) in self.group_used and (current is None or current[0] != c):
+            return None
+        if self._barred(key, c):
+            return None
+        salle = rnd.choice(self.salles)
+        if (c, salle) in self.room_used or not self._fits(key, salle):
+            return None
+        return {key: (c, salle)}
+
+    def delta(self, moves):
+        clash = self.clashes.delta({k: self._day(p) for k, p in moves.items()})
+        placed = sum((p is None) - (self.assignment[k] is None) for k, p in moves.items())
+        soft = self.soft.delta(moves) if self.soft is not None else 0
+        return clash + UNPLACED_WEIGHT * placed + soft
+
+    def apply(self, moves):
+        for key in moves:
+            if self.assignment[key] is not None:
+                self._unbook(key, self.assignment[key])
+        for key, placement in moves.items():
+            self.assignment[key] = placement
+            if placement is not None:
+                self._book(key, placement)
+        self.clashes.apply({k: self._day(p) for k, p in moves.items()})
+        if self.soft is not None:
+            self.soft.apply(moves)
+
+
+def _finish(best, best_key, initial_cost, iterations, started, reason):
+    return best, {
+        "initial_cost": initial_cost,
+        "best_cost": best_key[-1],
+        "clashes": best_key[0] // CLASH_WEIGHT,
+        "iterations": iterations,
+        "elapsed": time.perf_counter() - started,
+        "stopped": reason,
+    }
+
+
+def simulated_annealing(state, budget=30.0, seed=None, t_start=None, t_end=0.5,
+                        patience=500000, target=0):
+    """Anneal `state` for at most `budget` seconds.
+
+    The temperature decays geometrically from `t_start` to `t_end` over the
+    budget. Stops early once `target` is reached or after `patience`
+    iterations without improving the best cost.
+    Returns (best_assignment, stats).
+    """
+    rnd = random.Random(seed)
+    started = time.perf_counter()
+    t_start = t_start or 2 * CLASH_WEIGHT
+    cost = initial_cost = state.cost
+    best_key = state.rank
+    best = dict(state.assignment)
+    iterations = since_best = 0
+
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget:
+            return _finish(best, best_key, initial_cost, iterations, started, "budget")
+        if best_key[-1] <= target:
+            return _finish(best, best_key, initial_cost, iterations, started, "target")
+        if since_best >= patience:
+            return _finish(best, best_key, initial_cost, iterations, started, "converged")
+
+        iterations += 1
+        since_best += 1
+        moves = state.random_move(rnd)
+        if moves is None:
+            continue
+
+        d = state.delta(moves)
+        temperature = t_start * (t_end / t_start) ** (elapsed / budget)
+        if d <= 0 or rnd.random() < math.exp(-d / temperature):
+            state.apply(moves)
+            cost += d
+            if state.rank < best_key:
+                best_key = state.rank
+                best = dict(state.assignment)
+                since_best = 0
+
+
+def tabu_search(state, budget=30.0, seed=None, candidates=40, tenure=5,
+                patience=5000, target=0):
+    """Tabu search on `state` for at most `budget` seconds.
+
+    Each iteration samples `candidates` moves and applies the best one whose
+    exams were not moved in the last `tenure` iterations (a tabu move is
+    still taken if it beats the best cost). While exams are unplaced the
+    neighbourhood is insert moves only, as in partial-colouring tabu search.
+    Returns (best_assignment, stats).
+    """
+    rnd = random.Random(seed)
+    started = time.perf_counter()
+    cost = initial_cost = state.cost
+    best_key = state.rank
+    best = dict(state.assignment)
+    tabu_until = {}
+    iterations = since_best = 0
+
+    while True:
+        if time.perf_counter() - started >= budget:
+            return _finish(best, best_key, initial_cost, iterations, started, "budget")
+        if best_key[-1] <= target:
+            return _finish(best, best_key, initial_cost, iterations, started, "target")
+        if since_best >= patience:
+            return _finish(best, best_key, initial_cost, iterations, started, "converged")
+
+        iterations += 1
+        since_best += 1
+        chosen, chosen_delta = None, None
+        for _ in range(candidates):
+            moves = state.random_move(rnd, insert_rate=1.0)
+            if moves is None:
+                continue
+            d = state.delta(moves)
+            is_tabu = any(tabu_until.get(k, 0) > iterations for k in moves)
+            if is_tabu and cost + d >= best_key[-1]:
+                continue
+            if chosen is None or d < chosen_delta:
+                chosen, chosen_delta = moves, d
+        if chosen is None:
+            continue
+
+        state.apply(chosen)
+        cost += chosen_delta
+        for k in chosen:
+            tabu_until[k] = iterations + tenure
+        if state.rank < best_key:
+            best_key = state.rank
+            best = dict(state.assignment)
+            since_best = 0
+
+
+METHODS = {
+    "anneal": simulated_annealing,
+    "tabu": tabu_search,
+}
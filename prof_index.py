@@ -0,0 +1,85 @@
+"""Professor index for supervision assignment.
+
+Professors are grouped by department in min-heaps keyed by current load,
+and each one has a bitmap of the creneaux where they are already busy, so
+picking the least-loaded free professor costs O(log P) in the usual case.
+Unavailable creneaux are a second bitmap, and the per-day limit (3 exams,
+as enforced by the examen trigger) is a popcount of busy & the day's mask:
+every availability test is a couple of integer operations.
+"""
+import heapq
+from collections import defaultdict
+
+
+MAX_PER_DAY = 3
+
+
+class ProfIndex:
+    def __init__(self, profs, creneaux, rnd=None, days=None, max_per_day=MAX_PER_DAY,
+                 unavailable=None):
+        """`profs` is an iterable of (id_prof, id_dept); `creneaux` the slot grid.
+
+        `rnd` (a random.Random) breaks ties between equally loaded professors.
+        `days` maps creneau -> day (all on one day when omitted); a professor
+        takes at most `max_per_day` creneaux per day (None: no limit).
+        `unavailable` maps id_prof -> creneaux they cannot take.
+        """
+        self.bit = {c: 1 << i for i, c in enumerate(creneaux)}
+        days = days or {}
+        day_bits = {}
+        for c, bit in self.bit.items():
+            day_bits[days.get(c)] = day_bits.get(days.get(c), 0) | bit
+        self.day_mask = {c: day_bits[days.get(c)] for c in self.bit}
+        self.max_per_day = max_per_day
+        self.blocked = {
+            pid: sum(self.bit[c] for c in set(cs) if c in self.bit)
+            for pid, cs in (unavailable or {}).items()
+        }
+        self.dept = {}
+        self.busy = {}  # id_prof -> bitmap of busy creneaux
+        self.load = {}  # id_prof -> number of exams assigned
+        self.tie = {}
+        self.heaps = defaultdict(list)  # id_dept -> [(load, tie, id_prof)]
+        for i, (pid, dept_id) in enumerate(profs):
+            self.dept[pid] = dept_id
+            self.busy[pid] = 0
+            self.load[pid] = 0
+            self.tie[pid] = rnd.random() if rnd is not None else i
+            self.heaps[dept_id].append((0, self.tie[pid], pid))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def is_free(self, pid, creneau):
+        """Available at `creneau`, not busy there and under the day limit."""
+        busy = self.busy[pid]
+        if (busy | self.blocked.get(pid, 0)) & self.bit[creneau]:
+            return False
+        return self.max_per_day is None or (busy & self.day_mask[creneau]).bit_count() < self.max_per_day
+
+    def pick(self, dept_id, creneau):
+        """Least-loaded professor of `dept_id` free at `creneau`, or None.
+
+        Nothing is reserved until assign() is called.
+        """
+        heap = self.heaps.get(dept_id)
+        if not heap:
+            return None
+        skipped = []
+        found = None
+        while heap:
+            entry = heapq.heappop(heap)
+            load, _, pid = entry
+            if load != self.load[pid]:
+                continue  # stale entry, a newer one is in the heap
+            skipped.append(entry)
+            if self.is_free(pid, creneau):
+                found = pid
+                break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return found
+
+    def assign(self, pid, creneau):
+        self.busy[pid] |= self.bit[creneau]
+        self.load[pid] += 1
+        heapq.heappush(self.heaps[self.dept[pid]], (self.load[pid], self.tie[pid], pid))
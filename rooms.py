@@ -0,0 +1,89 @@
+"""Room index sorted by capacity, with one free list per creneau.
+
+best_fit() finds the smallest free room that seats a cohort by bisection,
+so small exams stop taking the large amphitheatres. pack() splits a cohort
+too large for any single room across several free rooms.
+"""
+import bisect
+
+
+UNLIMITED = float("inf")
+
+
+class RoomIndex:
+    def __init__(self, salles):
+        """`salles` is an iterable of (id_salle, capacite); a None capacity is unlimited."""
+        self.capacity = {sid: UNLIMITED if cap is None else cap for sid, cap in salles}
+        self.rooms = sorted((cap, sid) for sid, cap in self.capacity.items())
+        self._free = {}  # creneau -> sorted [(capacite, id_salle)] still free
+
+    def _free_list(self, creneau):
+        free = self._free.get(creneau)
+        if free is None:
+            free = self._free[creneau] = list(self.rooms)
+        return free
+
+    def best_fit(self, creneau, size):
+        """Smallest room free at `creneau` with capacite >= size, or None."""
+        free = self._free_list(creneau)
+        i = bisect.bisect_left(free, (size,))
+        return free[i][1] if i < len(free) else None
+
+    def pack(self, creneau, size):
+        """Rooms free at `creneau` that seat `size` together, as
+        [(id_salle, places)], or None when the free seats do not suffice.
+
+        A single best-fit room is used when one exists. Otherwise the largest
+        free rooms are filled first (first-fit decreasing) and the remainder
+        goes to the smallest free room that still holds it.
+        """
+        sid = self.best_fit(creneau, size)
+        if sid is not None:
+            return [(sid, size)]
+
+        free = self._free_list(creneau)
+        chosen = []
+        remaining = size
+        i = len(free) - 1
+        while remaining > 0 and i >= 0:
+            j = bisect.bisect_left(free, (remaining,), 0, i + 1)
+            if j <= i:
+                chosen.append((free[j][1], remaining))
+                remaining = 0
+                break
+            cap, sid = free[i]
+            chosen.append((sid, cap))
+            remaining -= cap
+            i -= 1
+        return chosen if remaining <= 0 else None
+
+    def is_free(self, creneau, sid):
+        free = self._free_list(creneau)
+        key = (self.capacity[sid], sid)
+        i = bisect.bisect_left(free, key)
+        return i < len(free) and free[i] == key
+
+    def take(self, creneau, sid):
+        free = self._free_list(creneau)
+        del free[bisect.bisect_left(free, (self.capacity[sid], sid))]
+
+    def release(self, creneau, sid):
+        bisect.insort(self._free_list(creneau), (self.capacity[sid], sid))
+
+
+def item_salles(item):
+    """Every salle a schedule item occupies (a split cohort lists them in `repartition`)."""
+    if item.get("repartition"):
+        return [sid for sid, _ in item["repartition"]]
+    return [item["id_salle"]]
+
+
+def utilisation(placements):
+    """Seats used / seats offered over (nb_etudiants, capacite) pairs of placed exams."""
+    used = offered = 0
+    for size, cap in placements:
+        if cap is None or cap == UNLIMITED:
+            continue
+        used += size
+        offered += cap
+    return used / offered if offered else 0.0
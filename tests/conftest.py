@@ -0,0 +1,47 @@
+"""Small in-memory scheduling problems shaped like algorithme.load_problem()."""
+import datetime
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrollment import Enrollment  # noqa: E402
+
+
+def build_problem(n_modules=24, n_students=240, per_student=3, capacities=(40, 60, 120, 200),
+                  n_days=6, per_day=3, n_profs=0, blocks=6, seed=0):
+    """Random problem: each student takes `per_student` modules of one of
+    `blocks` groups of modules (groups never share students); with
+    `n_profs`, module m is in the charge of professor 1 + m % n_profs."""
+    rnd = random.Random(seed)
+    mids = list(range(1, n_modules + 1))
+    groups = [mids[i::blocks] for i in range(blocks)]
+    pairs = [
+        (mid, etud)
+        for etud in range(1000, 1000 + n_students)
+        for mid in rnd.sample(groups[etud % blocks], per_student)
+    ]
+    enrollment = Enrollment([mid for mid, _ in pairs], [etud for _, etud in pairs])
+    first_day = datetime.date(2026, 1, 19)
+    creneaux = [
+        (day * per_day + k + 1, first_day + datetime.timedelta(days=day),
+         datetime.time(8 + 3 * k), datetime.time(10 + 3 * k))
+        for day in range(n_days) for k in range(per_day)
+    ]
+    return {
+        "modules": [(mid, f"M{mid}") for mid in mids],
+        "module_students": enrollment,
+        "nb_inscrits": {mid: enrollment.size(mid) for mid in mids},
+        "salles": [(sid, f"S{sid}", cap) for sid, cap in enumerate(capacities, 1)],
+        "creneaux": creneaux,
+        "module_prof": {mid: 1 + mid % n_profs for mid in mids} if n_profs else {},
+        "indisponibilites": {},
+    }
+
+
+@pytest.fixture
+def problem():
+    return build_problem()
@@ -0,0 +1,41 @@
+from bounds import greedy_clique, quality_report, slot_lower_bound
+
+
+def _graph(edges, nodes):
+    graph = {n: {} for n in nodes}
+    for a, b in edges:
+        graph[a][b] = graph[b][a] = 1
+    return graph
+
+
+def test_greedy_clique_finds_the_triangle():
+    graph = _graph([(1, 2), (2, 3), (1, 3), (3, 4), (5, 6)], range(1, 7))
+    clique = greedy_clique(graph)
+    assert sorted(clique) == [1, 2, 3]
+    assert all(b in graph[a] for a in clique for b in clique if a != b)
+
+
+def test_bound_is_the_largest_of_the_three():
+    graph = _graph([(1, 2)], [1, 2, 3, 4, 5])
+    sizes = {1: 100, 2: 100, 3: 100, 4: 50, 5: 50}
+    assert slot_lower_bound(sizes, graph, [100, 100]) == {"clique": 2, "seats": 2, "rooms": 3, "bound": 3}
+    assert slot_lower_bound(sizes, graph, [60, 60])["bound"] == 4  # 400 seats over 120 per creneau
+    assert slot_lower_bound(sizes, graph, [400, 400, 400], max_student_load=5)["bound"] == 5
+    assert slot_lower_bound({}, {}, [])["bound"] == 0
+
+
+def test_unlimited_room_never_binds_the_seats():
+    bounds = slot_lower_bound({1: 100, 2: 100}, _graph([], [1, 2]), [None, 30])
+    assert bounds["seats"] == 0
+    assert bounds["bound"] == 1
+
+
+def test_quality_report():
+    bounds = {"clique": 3, "seats": 2, "rooms": 1, "bound": 3}
+    assert quality_report(3, 0, 10, bounds)["optimal"]
+    assert quality_report(4, 0, 10, bounds)["gap"] == 1
+    report = quality_report(2, 3, 2, bounds)
+    assert report["gap"] is None  # the bound is for placing every module
+    assert report["unplaced"] == 3
+    assert not report["optimal"]
+    assert report["grid_too_small"]
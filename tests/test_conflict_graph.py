@@ -0,0 +1,26 @@
+from itertools import combinations
+
+from conftest import build_problem
+from conflict_graph import build_conflict_graph, connected_components
+
+
+def test_counts_shared_students():
+    graph = build_conflict_graph({1: [10, 11, 12], 2: [11, 12], 3: [12], 4: [99]})
+    assert graph[1] == {2: 2, 3: 1}
+    assert graph[2] == {1: 2, 3: 1}
+    assert graph[4] == {}
+
+
+def test_enrollment_matches_brute_force():
+    enrollment = build_problem(n_modules=15, n_students=80, blocks=1)["module_students"]
+    students = {mid: set(enrollment.student_ids[enrollment.students(mid)].tolist()) for mid in enrollment}
+    graph = build_conflict_graph(enrollment)
+    for a, b in combinations(students, 2):
+        shared = len(students[a] & students[b])
+        assert graph[a].get(b, 0) == shared
+        assert graph[b].get(a, 0) == shared
+
+
+def test_components_largest_first():
+    graph = build_conflict_graph({1: [10], 2: [10, 11], 3: [11], 4: [20], 5: [20], 6: [30]})
+    assert [sorted(c) for c in connected_components(graph)] == [[1, 2, 3], [4, 5], [6]]
@@ -0,0 +1,79 @@
+import random
+
+from conftest import build_problem
+from cost_model import CLASH_WEIGHT, SOFT_TERMS, IncrementalCost, SoftCost, back_to_back, gap_days, room_changes
+
+
+def _students_of():
+    enrollment = build_problem(n_modules=12, n_students=60, blocks=1)["module_students"]
+    return {mid: enrollment.students(mid) for mid in enrollment}
+
+
+def _clash_cost(assignment, students_of):
+    occupancy = {}
+    for key, creneau in assignment.items():
+        if creneau is not None:
+            for s in students_of[key].tolist():
+                occupancy[(s, creneau)] = occupancy.get((s, creneau), 0) + 1
+    return CLASH_WEIGHT * sum(n - 1 for n in occupancy.values())
+
+
+def test_clash_cost_counts_extra_exams():
+    cost = IncrementalCost({"a": 1, "b": 1, "c": 1, "d": 2}, {"a": [7], "b": [7], "c": [7, 8], "d": [8]})
+    assert cost.cost == 2 * CLASH_WEIGHT
+    assert cost.delta({"c": 2}) == 0  # 7 loses one clash, 8 gains one
+    assert cost.delta({"c": None}) == -CLASH_WEIGHT
+
+
+def test_clash_deltas_match_recompute():
+    rnd = random.Random(1)
+    students_of = _students_of()
+    keys = list(students_of)
+    cost = IncrementalCost({key: rnd.randrange(4) for key in keys}, students_of)
+    assert cost.cost == _clash_cost(cost.assignment, students_of)
+
+    for _ in range(300):
+        if rnd.random() < 0.5:
+            a, b = rnd.sample(keys, 2)
+            moves = cost.swap_moves(a, b)
+        else:
+            moves = {rnd.choice(keys): rnd.choice([None, 0, 1, 2, 3])}
+        expected = _clash_cost({**cost.assignment, **moves}, students_of) - cost.cost
+        assert cost.delta(moves) == expected
+        assert cost.apply(moves) == expected
+        assert cost.cost == _clash_cost(cost.assignment, students_of)
+
+
+def _soft_cost(assignment, students_of, grid, terms=SOFT_TERMS):
+    exams = {}
+    for key, placement in assignment.items():
+        if placement is not None:
+            for s in students_of[key].tolist():
+                exams.setdefault(s, []).append((*grid[placement[0]], placement[1]))
+    return sum(weight * term(sorted(v)) for v in exams.values() for term, weight in terms.values())
+
+
+def test_soft_terms():
+    same_day = [(1, 0, "A"), (1, 1, "B"), (3, 0, "B")]
+    assert gap_days(same_day) == 2  # 0 days apart (short by 2), then 2 days apart
+    assert back_to_back(same_day) == 1
+    assert room_changes(same_day) == 1
+
+
+def test_soft_deltas_match_recompute():
+    rnd = random.Random(4)
+    students_of = _students_of()
+    keys = list(students_of)
+    grid = {c: (c // 3, c % 3) for c in range(12)}
+    placements = [(c, salle) for c in grid for salle in "ABC"]
+    assignment = {key: rnd.choice(placements) for key in keys}
+    cost = SoftCost(assignment, students_of, grid)
+    assert cost.cost == _soft_cost(assignment, students_of, grid)
+
+    for _ in range(300):
+        moves = {key: rnd.choice(placements + [None]) for key in rnd.sample(keys, rnd.randint(1, 2))}
+        expected = _soft_cost({**assignment, **moves}, students_of, grid) - cost.cost
+        assert cost.delta(moves) == expected
+        assert cost.apply(moves) == expected
+        assignment.update(moves)
+        assert cost.cost == _soft_cost(assignment, students_of, grid)
@@ -0,0 +1,63 @@
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("psycopg2")  # algorithme imports the db layer
+
+from algorithme import decompose_schedule, generate_exam_schedule  # noqa: E402
+from conftest import build_problem  # noqa: E402
+from rooms import item_salles  # noqa: E402
+from validator import validate_schedule  # noqa: E402
+
+
+def test_parts_share_rooms_without_collisions():
+    problem = build_problem(n_modules=24, capacities=(40, 60, 120, 200, 60, 40), n_days=4, per_day=4,
+                            blocks=3)
+    schedule, stats = decompose_schedule(problem, workers=3)
+
+    assert stats["components"] == 3
+    assert stats["parts"] == 3
+    assert [item["id_module"] for item in schedule] == [m[0] for m in problem["modules"]]
+    rooms = Counter(
+        (item["id_creneau"], sid) for item in schedule if item["id_creneau"] is not None
+        for sid in item_salles(item)
+    )
+    assert max(rooms.values()) == 1
+    assert not validate_schedule(schedule, problem)
+
+
+def test_modules_of_one_professor_stay_in_one_part():
+    # the two blocks share no student but do share professors (module m -> 1 + m % 3)
+    problem = build_problem(n_modules=8, n_students=40, n_days=6, blocks=2, n_profs=3)
+    schedule, stats = decompose_schedule(problem, workers=2)
+    assert stats["components"] == 1
+    assert stats["parts"] == 1
+    assert not validate_schedule(schedule, problem)
+
+
+def _unplaced(schedule):
+    return sum(1 for item in schedule if item["id_creneau"] is None)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_never_worse_than_one_piece(seed):
+    problem = build_problem(n_modules=40, n_students=600, n_days=12, per_day=3, blocks=4, seed=seed)
+    schedule, stats = decompose_schedule(problem, workers=4)
+
+    assert stats["parts"] == 4
+    assert _unplaced(schedule) <= _unplaced(generate_exam_schedule(problem, mode="dsatur"))
+    assert _unplaced(schedule) == 0
+    assert not validate_schedule(schedule, problem)
+
+
+def test_contested_salles_are_re_placed():
+    # two identical cohorts, one large salle: both parts want it at the first creneau
+    problem = build_problem(n_modules=4, n_students=200, per_student=2, capacities=(150, 40), n_days=2,
+                            per_day=2, blocks=2)
+    schedule, stats = decompose_schedule(problem, workers=2)
+
+    assert stats["contested"] > 0
+    assert stats["recovered"] == stats["retried"]
+    assert not stats["fallback"]
+    assert _unplaced(schedule) == 0
+    assert not validate_schedule(schedule, problem)
@@ -0,0 +1,54 @@
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("psycopg2")  # algorithme imports the db layer
+
+from algorithme import ENGINES, generate_exam_schedule  # noqa: E402
+from conftest import build_problem  # noqa: E402
+from rooms import item_salles  # noqa: E402
+from validator import validate_schedule  # noqa: E402
+
+
+@pytest.mark.parametrize("mode", sorted(ENGINES))
+@pytest.mark.parametrize("n_profs", [0, 5])
+def test_engine_places_every_module_without_violation(mode, n_profs):
+    problem = build_problem(n_days=8, per_day=4, n_profs=n_profs)
+    schedule = generate_exam_schedule(problem, mode=mode)
+
+    assert [item["id_module"] for item in schedule] == [m[0] for m in problem["modules"]]
+    assert all(item["id_creneau"] is not None for item in schedule)
+    assert not validate_schedule(schedule, problem)
+    rooms = Counter((item["id_creneau"], sid) for item in schedule for sid in item_salles(item))
+    assert max(rooms.values()) == 1
+
+
+@pytest.mark.parametrize("mode", sorted(ENGINES))
+@pytest.mark.parametrize("blocks", [1, 6])
+def test_engine_gives_students_one_exam_per_day(mode, blocks):
+    problem = build_problem(n_days=8, per_day=4, n_profs=5, blocks=blocks)
+    schedule = generate_exam_schedule(problem, mode=mode)
+
+    assert not [v for v in validate_schedule(schedule, problem) if v["rule"] == "student_day"]
+
+
+@pytest.mark.parametrize("mode", sorted(ENGINES))
+def test_engine_leaves_unplaceable_modules_unscheduled(mode):
+    # every module shares students with every other: one day each
+    problem = build_problem(n_modules=6, n_students=60, per_student=6, n_days=4, per_day=2, blocks=1)
+    schedule = generate_exam_schedule(problem, mode=mode)
+
+    placed = [item for item in schedule if item["id_creneau"] is not None]
+    assert len(placed) == 4
+    assert all(item["note"] == "Not scheduled" for item in schedule if item["id_creneau"] is None)
+    assert not validate_schedule(schedule, problem)
+
+
+def test_seed_is_reproducible(problem):
+    first = generate_exam_schedule(problem, mode="dsatur", seed=7)
+    assert generate_exam_schedule(problem, mode="dsatur", seed=7) == first
+
+
+def test_unknown_mode(problem):
+    with pytest.raises(ValueError):
+        generate_exam_schedule(problem, mode="tabu")
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from enrollment import Enrollment
+
+
+PAIRS = [(30, 7), (10, 5), (10, 7), (20, 9), (30, 5), (10, 9), (30, 9)]
+
+
+@pytest.fixture
+def enrollment():
+    return Enrollment([m for m, _ in PAIRS], [s for _, s in PAIRS])
+
+
+def test_mapping_matches_the_pairs(enrollment):
+    assert list(enrollment) == [10, 20, 30]
+    assert len(enrollment) == enrollment.n_modules == 3
+    assert enrollment.n_students == 3
+    for mid in (10, 20, 30):
+        expected = sorted(s for m, s in PAIRS if m == mid)
+        assert enrollment.student_ids[enrollment[mid]].tolist() == expected
+        assert enrollment.size(mid) == len(expected)
+    assert 40 not in enrollment
+    assert enrollment.get(40) is None
+    assert enrollment.size(40) == 0
+    assert len(enrollment.students(40)) == 0
+    with pytest.raises(KeyError):
+        enrollment[40]
+
+
+def test_student_side(enrollment):
+    assert enrollment.index_of(9) == 2
+    assert enrollment.index_of(8) is None
+    assert enrollment.modules_of(enrollment.index_of(9)).tolist() == [10, 20, 30]
+    assert enrollment.max_student_load == 3
+
+
+def test_subset_and_matrix(enrollment):
+    part = enrollment.subset([20, 30, 40])
+    assert list(part) == [20, 30]
+    assert part.student_ids[part[30]].tolist() == [5, 7, 9]
+
+    matrix = enrollment.matrix().toarray()
+    assert matrix.shape == (3, 3)
+    assert matrix.sum() == len(PAIRS)
+    assert np.array_equal(matrix[:, 1], [0, 0, 1])  # only student 9 takes module 20
+
+
+def test_from_cursor_streams_in_chunks():
+    class Cursor:
+        def __init__(self, rows):
+            self.rows = list(rows)
+
+        def fetchmany(self, n):
+            chunk, self.rows = self.rows[:n], self.rows[n:]
+            return chunk
+
+    streamed = Enrollment.from_cursor(Cursor(PAIRS), fetch_size=2)
+    assert {mid: streamed.size(mid) for mid in streamed} == {10: 3, 20: 1, 30: 3}
+    assert Enrollment.from_cursor(Cursor([])).n_modules == 0
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from conftest import build_problem  # noqa: E402
+from generate_edt import generer_planning, optimiser_planning  # noqa: E402
+
+
+def _donnees(problem):
+    enrollment = problem["module_students"]
+    return {
+        "examens": [(100 + mid, mid) for mid, _ in problem["modules"]],
+        "salles": [(sid, cap) for sid, _, cap in problem["salles"]],
+        "creneaux": [(date_exam, f"{hd:%H:%M}-{hf:%H:%M}") for _, date_exam, hd, hf in problem["creneaux"]],
+        "profs": [(pid, pid % 2) for pid in range(1, 11)],
+        "indisponibilites": {},
+        "nb_etudiants_par_module": dict(problem["nb_inscrits"]),
+        "module_dept": {mid: mid % 2 for mid, _ in problem["modules"]},
+        "inscriptions": enrollment,
+    }
+
+
+def _student_days(donnees, planning):
+    module_examen = dict(donnees["examens"])
+    seen, twice = set(), 0
+    for id_examen, c, _, _ in planning:
+        for s in donnees["inscriptions"].students(module_examen[id_examen]).tolist():
+            twice += (s, c[0]) in seen
+            seen.add((s, c[0]))
+    return twice
+
+
+@pytest.mark.parametrize("blocks", [1, 5])
+def test_one_exam_per_student_per_day(blocks):
+    # 20 modules over 12 creneaux on 4 days
+    donnees = _donnees(build_problem(n_modules=20, n_students=200, n_days=4, per_day=3, blocks=blocks))
+    planning = generer_planning(donnees, seed=0)
+    assert _student_days(donnees, planning) == 0
+
+    optimise, _ = optimiser_planning(donnees, planning, budget=0.5, seed=0)
+    assert _student_days(donnees, optimise) == 0
+    rooms = [(c, s) for _, c, repartition, _ in optimise for s, _ in repartition]
+    assert len(set(rooms)) == len(rooms)
+
+
+def test_oversized_cohort_is_split():
+    donnees = _donnees(build_problem(n_modules=4, n_students=400, per_student=2, capacities=(150, 100, 60),
+                                     blocks=2))
+    planning = generer_planning(donnees, seed=0)
+    assert len(planning) == 4
+    sizes = {100 + mid: n for mid, n in donnees["nb_etudiants_par_module"].items()}
+    capacite = dict(donnees["salles"])
+    for id_examen, _, repartition, _ in planning:
+        assert sum(places for _, places in repartition) == sizes[id_examen]
+        assert all(places <= capacite[s] for s, places in repartition)
+    assert any(len(repartition) > 1 for _, _, repartition, _ in planning)
+
+    optimise, _ = optimiser_planning(donnees, planning, budget=0.3, seed=0)
+    split = {e: r for e, _, r, _ in planning if len(r) > 1}
+    assert all(r == split[e] for e, _, r, _ in optimise if e in split)
@@ -0,0 +1,99 @@
+import pytest
+
+pytest.importorskip("psycopg2")  # execute_values
+
+from invigilation import assign_invigilators, save_invigilators  # noqa: E402
+
+PROFS = [(1, "info"), (2, "info"), (3, "info"), (4, "math"), (5, "math")]
+
+
+def test_department_rule_is_hard():
+    # four info seats at creneau 1, only three info professors
+    exams = [(10, 1, [100, 101], "info")]
+    rows, stats = assign_invigilators(exams, PROFS, [1])
+
+    assert {dict(PROFS)[pid] for _, pid in rows} == {"info"}
+    assert stats["assigned"] == 3
+    assert stats["missing"] == 1
+    assert stats["understaffed"] == [10]
+
+
+def test_dept_penalty_lends_other_departments():
+    exams = [(10, 1, [100, 101], "info")]
+    rows, stats = assign_invigilators(exams, PROFS, [1], dept_penalty=5)
+
+    assert stats["missing"] == 0
+    assert [dict(PROFS)[pid] for _, pid in rows].count("math") == 1
+
+
+def test_exam_without_department_takes_anyone():
+    rows, stats = assign_invigilators([(10, 1, [100], None)], [(4, "math"), (5, "math")], [1])
+    assert sorted(pid for _, pid in rows) == [4, 5]
+
+
+def test_busy_and_day_limit_are_respected():
+    creneaux = [1, 2, 3, 4]
+    days = {1: "lun", 2: "lun", 3: "lun", 4: "mar"}
+    exams = [(10 + c, c, [100], "info") for c in creneaux]
+    rows, stats = assign_invigilators(
+        exams, PROFS, creneaux, per_room=1, days=days, max_per_day=1, busy=[(1, 1), (1, 4)]
+    )
+
+    by_exam = dict(rows)
+    assert by_exam[14] != 1  # professor 1 is busy there
+    lundi = [pid for id_examen, pid in rows if id_examen in (11, 12, 13)]
+    # professor 1's busy creneau uses their one lundi: two info professors for three seats
+    assert sorted(lundi) == [2, 3]
+    assert stats["missing"] == 1
+    assert len(stats["understaffed"]) == 1 and stats["understaffed"][0] in (11, 12, 13)
+
+
+def test_loads_stay_balanced():
+    creneaux = list(range(1, 13))
+    exams = [(10 + c, c, [100, 101], "info") for c in creneaux]  # 4 seats per creneau, 48 in all
+    profs = [(pid, "info") for pid in range(1, 9)]
+    rows, stats = assign_invigilators(exams, profs, creneaux, max_per_day=None)
+
+    assert stats["assigned"] == 48
+    assert (stats["min_load"], stats["max_load"]) == (6, 6)
+    for c in creneaux:
+        supervisors = [pid for id_examen, pid in rows if id_examen == 10 + c]
+        assert len(supervisors) == len(set(supervisors))
+
+
+def test_loads_count_only_professors_who_supervise():
+    rows, stats = assign_invigilators([(10, 1, [100], "info")], PROFS, [1])
+    assert (stats["min_load"], stats["max_load"]) == (1, 1)
+
+
+class Cursor:
+    """Records the SQL sent; enough for execute_values."""
+
+    class connection:
+        encoding = "UTF8"
+
+    def __init__(self):
+        self.statements = []
+
+    def mogrify(self, template, args):
+        return (template.decode() % tuple(args)).encode()
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql.decode() if isinstance(sql, bytes) else sql, params))
+
+
+def test_save_is_one_delete_and_one_bulk_insert():
+    cur = Cursor()
+    save_invigilators(cur, [10, 11], [(10, 1), (10, 2), (11, 3)])
+
+    assert len(cur.statements) == 2
+    delete, insert = cur.statements
+    assert delete == ("DELETE FROM surveillance WHERE id_examen = ANY(%s)", ([10, 11],))
+    assert insert[0].startswith("INSERT INTO surveillance (id_examen, id_prof) VALUES ")
+    assert insert[0].endswith("(10,1),(10,2),(11,3)")
+
+
+def test_save_without_rows_only_deletes():
+    cur = Cursor()
+    save_invigilators(cur, [10], [])
+    assert [sql.split()[0] for sql, _ in cur.statements] == ["DELETE"]
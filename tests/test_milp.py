@@ -0,0 +1,108 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from conflict_graph import build_conflict_graph
+from conftest import build_problem
+from milp_scheduler import clique_cover, objective, solve_milp
+
+
+def test_clique_cover_covers_every_edge_with_cliques():
+    rnd = random.Random(0)
+    nodes = list(range(30))
+    graph = {n: {} for n in nodes}
+    for a, b in combinations(nodes, 2):
+        if rnd.random() < 0.3:
+            graph[a][b] = graph[b][a] = 1
+
+    cliques = clique_cover(graph, nodes)
+    for clique in cliques:
+        assert all(b in graph[a] for a, b in combinations(clique, 2))
+    covered = {frozenset(pair) for clique in cliques for pair in combinations(clique, 2)}
+    assert covered == {frozenset((a, b)) for a in nodes for b in graph[a]}
+    assert clique_cover(graph, nodes[:1]) == []
+
+
+def _solve(problem, **kwargs):
+    mids = [m[0] for m in problem["modules"]]
+    conflicts = build_conflict_graph(problem["module_students"])
+    placements, stats = solve_milp(
+        mids,
+        problem["nb_inscrits"],
+        conflicts,
+        [(s[0], s[2]) for s in problem["salles"]],
+        [c[0] for c in problem["creneaux"]],
+        time_limit=20,
+        days={c[0]: c[1] for c in problem["creneaux"]},
+        **kwargs
+    )
+    return placements, stats, conflicts
+
+
+def test_solution_respects_every_constraint():
+    problem = build_problem(n_modules=12, n_students=120, blocks=3, n_days=5, per_day=2, capacities=(40, 60, 80))
+    module_prof = {mid: 1 + mid % 4 for mid, _ in problem["modules"]}
+    days = {c[0]: c[1] for c in problem["creneaux"]}
+    fixed = {1: (1, [3])}
+    unavailable = {2: [2, 3]}
+    placements, stats, conflicts = _solve(
+        problem, fixed=fixed, groups=module_prof, max_per_day=1, unavailable=unavailable
+    )
+
+    assert stats["optimal"]
+    assert 1 not in placements
+    everything = {**placements, 1: (1, 3)}
+    assert len(everything) == 12
+    capacity = {s[0]: s[2] for s in problem["salles"]}
+    assert len(set(everything.values())) == len(everything)  # one exam per salle and creneau
+    for mid, (c, sid) in everything.items():
+        assert problem["nb_inscrits"][mid] <= capacity[sid]
+        assert all(days[everything[other][0]] != days[c] for other in conflicts[mid])
+    per_prof_day = Counter((module_prof[mid], days[c]) for mid, (c, _) in everything.items())
+    assert max(per_prof_day.values()) == 1
+    assert all(c not in unavailable.get(module_prof[mid], ()) for mid, (c, _) in everything.items())
+
+
+def test_infeasible_modules_stay_unplaced():
+    # a clique of 4 modules over 3 days: one of them cannot be placed
+    problem = build_problem(n_modules=4, n_students=40, per_student=4, blocks=1, n_days=3, per_day=2)
+    placements, stats, _ = _solve(problem)
+    assert len(placements) == 3
+    assert stats["objective"] == objective(1, 3, 6)
+
+
+@pytest.fixture
+def algorithme():
+    pytest.importorskip("psycopg2")  # algorithme imports the db layer
+    import algorithme
+    return algorithme
+
+
+def test_exact_keeps_the_incumbent_when_not_better(algorithme):
+    problem = build_problem(n_modules=6, n_students=60, blocks=2, n_days=3)
+    schedule, stats = algorithme.exact_schedule(problem, time_limit=20)
+    assert stats["used"] == "heuristic"
+    assert stats["objective"] >= stats["incumbent"]
+    assert schedule == algorithme.generate_exam_schedule(problem, mode="dsatur")
+
+
+def test_exact_keeps_the_incumbent_when_the_solver_finds_nothing(algorithme, monkeypatch):
+    problem = build_problem(n_modules=6, n_students=60, blocks=2, n_days=3)
+    monkeypatch.setattr(algorithme, "solve_milp", lambda *args, **kwargs: (None, {"objective": None}))
+    schedule, stats = algorithme.exact_schedule(problem)
+    assert stats["used"] == "heuristic"
+    assert schedule == algorithme.generate_exam_schedule(problem, mode="dsatur")
+
+
+def test_exact_improves_on_the_heuristic(algorithme):
+    # first-fit in table order uses four creneaux here, three suffice
+    problem = build_problem(n_modules=8, n_students=80, per_student=2, blocks=4, n_days=4, per_day=2,
+                            capacities=(60, 30, 30))
+    schedule, stats = algorithme.exact_schedule(problem, time_limit=20, mode="greedy")
+
+    assert stats["used"] == "milp"
+    assert stats["objective"] < stats["incumbent"]
+    assert len({item["id_creneau"] for item in schedule}) == stats["objective"]
+    assert not algorithme.validate_schedule(schedule, problem)
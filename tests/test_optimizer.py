@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from conftest import build_problem
+from conflict_graph import build_conflict_graph
+from optimizer import METHODS, ScheduleState
+
+
+def _state(problem, assignment, frozen=None, soft_terms=None):
+    enrollment = problem["module_students"]
+    creneaux = problem["creneaux"]
+    return ScheduleState(
+        assignment,
+        {mid: enrollment.students(mid) for mid in enrollment},
+        problem["nb_inscrits"],
+        {s[0]: s[2] for s in problem["salles"]},
+        [c[0] for c in creneaux],
+        groups=problem["module_prof"],
+        conflicts=build_conflict_graph(enrollment),
+        frozen=frozen,
+        days={c[0]: c[1] for c in creneaux},
+        max_per_day=3,
+        grid={c[0]: (c[1].toordinal(), (c[2].hour - 8) // 3) for c in creneaux},
+        soft_terms=soft_terms,
+    )
+
+
+def _random_assignment(problem, seed=0):
+    rnd = random.Random(seed)
+    free = [(c[0], s[0]) for c in problem["creneaux"] for s in problem["salles"]]
+    rnd.shuffle(free)
+    return {m[0]: free.pop() if rnd.random() < 0.8 else None for m in problem["modules"]}
+
+
+def test_move_deltas_match_recompute():
+    problem = build_problem(n_profs=6)
+    state = _state(problem, _random_assignment(problem))
+    rnd = random.Random(3)
+    applied = 0
+    for _ in range(2000):
+        moves = state.random_move(rnd)
+        if moves is None:
+            continue
+        before = state.cost
+        d = state.delta(moves)
+        state.apply(moves)
+        assert state.cost == pytest.approx(before + d)
+        applied += 1
+    assert applied
+    assert state.cost == pytest.approx(_state(problem, state.assignment).cost)
+
+
+def test_moves_keep_rooms_and_professors_consistent():
+    problem = build_problem(n_profs=6)
+    state = _state(problem, _random_assignment(problem, seed=1))
+    rnd = random.Random(5)
+    for _ in range(2000):
+        moves = state.random_move(rnd)
+        if moves is not None:
+            state.apply(moves)
+    placements = [p for p in state.assignment.values() if p is not None]
+    assert len(placements) == len(set(placements))
+    taken = [(problem["module_prof"][k], p[0]) for k, p in state.assignment.items() if p is not None]
+    assert len(taken) == len(set(taken))
+
+
+@pytest.mark.parametrize("method", sorted(METHODS))
+def test_search_never_worsens_and_keeps_frozen(method):
+    problem = build_problem(n_days=8, per_day=3, n_profs=6)
+    assignment = _random_assignment(problem, seed=2)
+    frozen_key = next(k for k, p in assignment.items() if p is not None)
+    state = _state(problem, assignment, frozen={frozen_key: []})
+    start = state.rank
+
+    best, stats = METHODS[method](state, budget=0.5, seed=0)
+
+    assert best[frozen_key] == assignment[frozen_key]
+    final = _state(problem, best, frozen={frozen_key: []})
+    assert final.rank <= start
+    assert stats["best_cost"] == pytest.approx(final.cost)
+
+
+def test_clashes_are_counted_per_day():
+    # four days for cohorts of four co-enrolled modules: one exam per day each
+    problem = build_problem(n_days=4, n_profs=6)
+    state = _state(problem, _random_assignment(problem, seed=3), soft_terms={})
+    best, stats = METHODS["anneal"](state, budget=1.0, seed=0)
+
+    assert stats["clashes"] == 0
+    enrollment = problem["module_students"]
+    day_of = {c[0]: c[1] for c in problem["creneaux"]}
+    seen = set()
+    for key, placement in best.items():
+        if placement is not None:
+            for s in enrollment.students(key).tolist():
+                assert (s, day_of[placement[0]]) not in seen
+                seen.add((s, day_of[placement[0]]))
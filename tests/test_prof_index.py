@@ -0,0 +1,45 @@
+import random
+
+from prof_index import ProfIndex
+
+
+def test_pick_least_loaded_of_the_department():
+    index = ProfIndex([(1, "info"), (2, "info"), (3, "math")], [10, 11, 12], max_per_day=None)
+    assert index.pick("info", 10) == 1
+    index.assign(1, 10)
+    assert index.pick("info", 11) == 2
+    index.assign(2, 11)
+    assert index.pick("info", 11) == 1  # 2 is busy at 11
+    assert index.pick("math", 10) == 3
+    assert index.pick("bio", 10) is None
+
+
+def test_pick_matches_brute_force():
+    rnd = random.Random(0)
+    profs = [(pid, pid % 3) for pid in range(1, 16)]
+    creneaux = list(range(8))
+    index = ProfIndex(profs, creneaux, max_per_day=None)
+    busy = {pid: set() for pid, _ in profs}
+    for _ in range(80):
+        dept, c = rnd.randrange(3), rnd.choice(creneaux)
+        free = [pid for pid, d in profs if d == dept and c not in busy[pid]]
+        pid = index.pick(dept, c)
+        if not free:
+            assert pid is None
+            continue
+        assert pid in free
+        assert len(busy[pid]) == min(len(busy[p]) for p in free)
+        index.assign(pid, c)
+        busy[pid].add(c)
+
+
+def test_day_limit_and_unavailability():
+    creneaux = [1, 2, 3, 4, 5]
+    days = {1: "lun", 2: "lun", 3: "lun", 4: "mar", 5: "mar"}
+    index = ProfIndex([(1, "info")], creneaux, days=days, max_per_day=2, unavailable={1: [5]})
+    index.assign(1, 1)
+    index.assign(1, 2)
+    assert not index.is_free(1, 3)  # third exam on lun
+    assert index.pick("info", 3) is None
+    assert index.is_free(1, 4)
+    assert not index.is_free(1, 5)  # unavailable
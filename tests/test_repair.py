@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("psycopg2")  # algorithme imports the db layer
+
+from algorithme import current_schedule, generate_exam_schedule, repair_schedule  # noqa: E402
+from rooms import item_salles  # noqa: E402
+from validator import validate_schedule  # noqa: E402
+
+
+def _assignments(schedule):
+    return {
+        item["id_module"]: (item["id_creneau"], item_salles(item))
+        for item in schedule if item["id_creneau"] is not None
+    }
+
+
+@pytest.fixture
+def current(problem):
+    return current_schedule(problem, _assignments(generate_exam_schedule(problem, mode="dsatur")))
+
+
+def test_current_schedule_round_trips_the_generated_placements(problem):
+    schedule = generate_exam_schedule(problem, mode="dsatur")
+    rebuilt = current_schedule(problem, _assignments(schedule))
+    assert _assignments(rebuilt) == _assignments(schedule)
+
+
+def test_closed_salle_moves_only_its_exams(problem, current):
+    closed = item_salles(next(item for item in current if item["id_creneau"] is not None))[0]
+    repaired, diff = repair_schedule(current, problem, {"closed_salles": [closed]})
+
+    touched = {item["id_module"] for item in current if closed in item_salles(item)}
+    assert {item["id_module"] for item in diff} == touched
+    for before, after in zip(current, repaired):
+        if before["id_module"] not in touched:
+            assert after == before
+        elif after["id_creneau"] is not None:
+            assert closed not in item_salles(after)
+    assert not validate_schedule(repaired, problem)
+
+
+def test_cancelled_creneau_is_emptied(problem, current):
+    cid = current[0]["id_creneau"]
+    repaired, diff = repair_schedule(current, problem, {"cancelled_creneaux": [cid]})
+
+    assert diff
+    assert all(item["id_creneau"] != cid for item in repaired)
+    assert not validate_schedule(repaired, problem)
+
+
+def test_added_inscription_displaces_an_exam_the_same_day(problem, current):
+    placed = [item for item in current if item["id_creneau"] is not None]
+    a, b = next(
+        (x, y) for x in placed for y in placed
+        if x["id_module"] < y["id_module"] and x["date"] == y["date"]
+    )
+    enrollment = problem["module_students"]
+    etud = int(enrollment.student_ids[enrollment.students(a["id_module"])[0]])
+
+    repaired, diff = repair_schedule(current, problem, {"added_inscriptions": [(b["id_module"], etud)]})
+
+    assert [item["id_module"] for item in diff] in ([a["id_module"]], [b["id_module"]])
+    by_module = {item["id_module"]: item for item in repaired}
+    assert by_module[a["id_module"]]["date"] != by_module[b["id_module"]]["date"]
+
+
+def test_no_change_no_diff(problem, current):
+    repaired, diff = repair_schedule(current, problem, {})
+    assert diff == []
+    assert repaired == current
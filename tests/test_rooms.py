@@ -0,0 +1,82 @@
+import random
+
+from rooms import RoomIndex, item_salles, utilisation
+
+
+def test_best_fit_is_smallest_free_room():
+    rooms = RoomIndex([(1, 200), (2, 40), (3, 60), (4, 60)])
+    assert rooms.best_fit(1, 50) == 3
+    assert rooms.best_fit(1, 40) == 2
+    assert rooms.best_fit(1, 201) is None
+
+    rooms.take(1, 3)
+    assert rooms.best_fit(1, 50) == 4
+    assert rooms.best_fit(2, 50) == 3  # other creneaux are untouched
+    rooms.take(1, 4)
+    assert rooms.best_fit(1, 50) == 1
+    rooms.release(1, 3)
+    assert rooms.is_free(1, 3) and not rooms.is_free(1, 4)
+    assert rooms.best_fit(1, 50) == 3
+
+
+def test_best_fit_matches_linear_scan():
+    rnd = random.Random(0)
+    capacities = {sid: rnd.choice([20, 40, 60, 120, 300]) for sid in range(1, 30)}
+    rooms = RoomIndex(capacities.items())
+    free = set(capacities)
+    for _ in range(200):
+        size = rnd.randrange(1, 320)
+        fitting = sorted((capacities[s], s) for s in free if capacities[s] >= size)
+        sid = rooms.best_fit(0, size)
+        assert sid == (fitting[0][1] if fitting else None)
+        if sid is not None and rnd.random() < 0.7:
+            rooms.take(0, sid)
+            free.discard(sid)
+        elif free != set(capacities):
+            back = rnd.choice(sorted(set(capacities) - free))
+            rooms.release(0, back)
+            free.add(back)
+
+
+def test_unlimited_room_fits_anything():
+    rooms = RoomIndex([(1, None), (2, 30)])
+    assert rooms.best_fit(1, 10) == 2
+    assert rooms.best_fit(1, 10 ** 6) == 1
+
+
+def test_item_salles_and_utilisation():
+    assert item_salles({"id_salle": 4}) == [4]
+    assert item_salles({"id_salle": 4, "repartition": [(4, 100), (7, 20)]}) == [4, 7]
+    assert utilisation([(30, 40), (50, 50), (10, None)]) == 80 / 90
+    assert utilisation([]) == 0.0
+
+
+def test_pack_uses_one_room_when_possible():
+    rooms = RoomIndex([(1, 200), (2, 40), (3, 60)])
+    assert rooms.pack(1, 50) == [(3, 50)]
+
+
+def test_pack_splits_large_cohorts():
+    rooms = RoomIndex([(1, 200), (2, 40), (3, 60), (4, 120)])
+    # largest first, then the smallest room holding the rest
+    assert rooms.pack(1, 350) == [(1, 200), (4, 120), (2, 30)]
+    assert rooms.pack(1, 421) is None
+
+
+def test_pack_seats_everyone_in_free_rooms():
+    rnd = random.Random(2)
+    capacities = {sid: rnd.choice([20, 40, 60, 120, 300]) for sid in range(1, 20)}
+    for creneau in range(100):
+        rooms = RoomIndex(capacities.items())
+        for sid in rnd.sample(sorted(capacities), rnd.randrange(len(capacities))):
+            rooms.take(creneau, sid)
+        free = {sid for sid in capacities if rooms.is_free(creneau, sid)}
+        size = rnd.randrange(1, 1200)
+        packing = rooms.pack(creneau, size)
+        if packing is None:
+            assert sum(capacities[sid] for sid in free) < size
+            continue
+        sids = [sid for sid, _ in packing]
+        assert len(sids) == len(set(sids)) and set(sids) <= free
+        assert all(0 < places <= capacities[sid] for sid, places in packing)
+        assert sum(places for _, places in packing) == size
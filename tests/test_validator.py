@@ -0,0 +1,93 @@
+import datetime
+from collections import Counter
+
+from conftest import build_problem
+from enrollment import Enrollment
+from validator import validate_schedule
+
+DAY1, DAY2 = datetime.date(2026, 1, 19), datetime.date(2026, 1, 20)
+
+
+def _problem():
+    # students 1 and 2 take modules 1 and 2, student 3 takes 2 and 3
+    pairs = [(1, 1), (2, 1), (1, 2), (2, 2), (2, 3), (3, 3)]
+    enrollment = Enrollment([m for m, _ in pairs], [s for _, s in pairs])
+    return {
+        "modules": [(1, "M1"), (2, "M2"), (3, "M3")],
+        "module_students": enrollment,
+        "nb_inscrits": {1: 2, 2: 3, 3: 2},
+        "salles": [(1, "S1", 2), (2, "S2", 3), (3, "S3", 1)],
+        "creneaux": [(1, DAY1, "08:00", "10:00"), (2, DAY1, "11:00", "13:00"), (3, DAY2, "08:00", "10:00")],
+        "module_prof": {1: 9, 2: 9, 3: 9},
+    }
+
+
+def _item(mid, cid, sid, repartition=None):
+    item = {"id_module": mid, "module": f"M{mid}", "id_creneau": cid, "id_salle": sid, "salle": f"S{sid}"}
+    if repartition:
+        item["repartition"] = repartition
+    return item
+
+
+def _rules(violations):
+    return Counter(v["rule"] for v in violations)
+
+
+def test_clean_schedule():
+    schedule = [_item(1, 1, 1), _item(2, 3, 2), _item(3, 2, 2)]
+    assert validate_schedule(schedule, _problem()) == []
+
+
+def test_unscheduled_items_are_ignored():
+    schedule = [_item(1, 1, 1), _item(2, None, None), _item(3, None, None)]
+    assert validate_schedule(schedule, _problem()) == []
+
+
+def test_capacity_counts_every_salle_of_a_split_exam():
+    problem = _problem()
+    assert _rules(validate_schedule([_item(2, 1, 1)], problem)) == {"capacity": 1}
+    split = _item(2, 1, 1, repartition=[(1, 2), (3, 1)])
+    assert validate_schedule([split], problem) == []
+
+
+def test_student_clash():
+    violations = validate_schedule([_item(1, 1, 1), _item(2, 1, 2), _item(3, 3, 1)], _problem())
+    # the same students also have two exams that day
+    assert _rules(violations) == {"student_clash": 1, "student_day": 1}
+    assert violations[0]["modules"] == [1, 2]
+    assert "2 student(s)" in violations[0]["message"]
+
+
+def test_same_day_is_a_violation():
+    # creneaux 1 and 2 are both on DAY1: students 1 and 2 sit modules 1 and 2 that day
+    violations = validate_schedule([_item(1, 1, 1), _item(2, 2, 2), _item(3, 3, 2)], _problem())
+    assert _rules(violations) == {"student_day": 1}
+    assert violations[0]["date"] == DAY1 and violations[0]["modules"] == [1, 2]
+
+
+def test_professor_day_limit():
+    violations = validate_schedule([_item(1, 1, 1), _item(2, 3, 2), _item(3, 2, 2)], _problem(), max_per_day=1)
+    assert _rules(violations) == {"professor_day": 1}
+    assert violations[0]["id_prof"] == 9 and violations[0]["date"] == DAY1
+
+
+def test_student_counts_match_brute_force():
+    problem = build_problem(n_modules=30, n_students=300, n_days=3, per_day=4)
+    creneaux = [c[0] for c in problem["creneaux"]]
+    day_of = {c[0]: c[1] for c in problem["creneaux"]}
+    schedule = [_item(mid, creneaux[i % len(creneaux)], 1) for i, (mid, _) in enumerate(problem["modules"])]
+    problem["salles"] = [(1, "S1", None)]
+
+    enrollment = problem["module_students"]
+    exams = {}
+    for item in schedule:
+        for s in enrollment.students(item["id_module"]).tolist():
+            exams.setdefault(s, []).append(item["id_creneau"])
+    clash = Counter(c for cs in exams.values() for c, n in Counter(cs).items() if n > 1)
+    same_day = Counter(d for cs in exams.values() for d, n in Counter(day_of[c] for c in cs).items() if n > 1)
+
+    violations = validate_schedule(schedule, problem)
+    found = {v["id_creneau"]: v for v in violations if v["rule"] == "student_clash"}
+    assert {cid: int(v["message"].split()[2]) for cid, v in found.items()} == clash
+    days = {v["date"]: v for v in violations if v["rule"] == "student_day"}
+    assert {day: int(v["message"].split()[2]) for day, v in days.items()} == same_day
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("psycopg2")  # algorithme imports the db layer
+
+from algorithme import generate_exam_schedule, kept_modules, solve_schedule  # noqa: E402
+from conftest import build_problem  # noqa: E402
+from rooms import item_salles  # noqa: E402
+from validator import validate_schedule  # noqa: E402
+
+
+@pytest.fixture
+def problem():
+    return build_problem(n_days=8, per_day=4, n_profs=5)
+
+
+@pytest.fixture
+def initial(problem):
+    schedule = generate_exam_schedule(problem, mode="dsatur", seed=1)
+    return {item["id_module"]: (item["id_creneau"], item_salles(item)) for item in schedule[::2]}
+
+
+@pytest.mark.parametrize("mode", ["greedy", "dsatur"])
+def test_feasible_placements_are_kept(problem, initial, mode):
+    schedule = generate_exam_schedule(problem, mode=mode, initial=initial)
+    assert kept_modules(schedule, initial) == set(initial)
+    assert not validate_schedule(schedule, problem)
+
+
+def test_optimiser_does_not_move_kept_modules(problem, initial):
+    schedule = solve_schedule(problem, seed=0, budget=0.3, initial=initial)
+    by_module = {item["id_module"]: item for item in schedule}
+    for mid, (cid, sids) in initial.items():
+        assert by_module[mid]["id_creneau"] == cid
+        assert item_salles(by_module[mid]) == sids
+    assert not validate_schedule(schedule, problem)
@@ -0,0 +1,115 @@
+"""In-memory check of a whole schedule, before anything is written.
+
+Mirrors fn_check_examen_constraints, so a schedule with no violation is one
+the trigger accepts:
+1. the salles of an exam seat all its students (module.nb_inscrits);
+2. a student has at most one exam per creneau;
+3. a student has at most one exam per day;
+4. a professor has at most MAX_PER_DAY exams per day.
+
+The student rules are one pass over the enrollment CSR arrays: every
+inscription gets its exam's creneau (or day), and (student, creneau) pairs
+seen twice are the clashes. All violations are returned together.
+"""
+from collections import Counter
+
+import numpy as np
+
+from prof_index import MAX_PER_DAY
+from rooms import item_salles
+
+
+def _double_booked(enrollment, slot_of):
+    """{slot: (n_students, [id_module])} for the slots where some student
+    has more than one exam; `slot_of` maps id_module -> slot."""
+    slots = sorted(set(slot_of.values()))
+    slot_pos = {s: i for i, s in enumerate(slots)}
+    module_slot = np.full(enrollment.n_modules, -1, dtype=np.int64)
+    for mid, slot in slot_of.items():
+        i = enrollment.module_index(mid)
+        if i is not None:
+            module_slot[i] = slot_pos[slot]
+
+    width = max(len(slots), 1)
+    counts = np.diff(enrollment.student_ptr)
+    students = np.repeat(np.arange(enrollment.n_students, dtype=np.int64), counts)
+    inscription_slot = module_slot[enrollment.student_modules]
+    scheduled = inscription_slot >= 0
+    keys = students[scheduled] * width + inscription_slot[scheduled]
+    unique, seen = np.unique(keys, return_counts=True)
+    clashing = unique[seen > 1]
+    found = {}
+    if len(clashing):
+        in_clash = np.isin(keys, clashing)
+        clash_modules = enrollment.student_modules[scheduled][in_clash]
+        clash_slots = inscription_slot[scheduled][in_clash]
+        for s in np.unique(clash_slots).tolist():
+            n_students = int(np.count_nonzero(clashing % width == s))
+            mids = enrollment.module_ids[np.unique(clash_modules[clash_slots == s])].tolist()
+            found[slots[s]] = (n_students, mids)
+    return found
+
+
+def validate_schedule(schedule, problem, max_per_day=MAX_PER_DAY):
+    """Violations of `schedule` (algorithme items) as [{"rule", "message", ...}]."""
+    enrollment = problem["module_students"]
+    nb_inscrits = problem.get("nb_inscrits") or {}
+    day_of = {c[0]: c[1] for c in problem["creneaux"]}
+    capacity = {s[0]: s[2] for s in problem["salles"]}
+    placed = [item for item in schedule if item.get("id_creneau") is not None]
+    violations = []
+
+    # 1) room capacity
+    for item in placed:
+        mid = item["id_module"]
+        n_students = nb_inscrits.get(mid, enrollment.size(mid))
+        caps = [capacity.get(sid) for sid in item_salles(item)]
+        if any(cap is None for cap in caps):
+            continue  # unlimited
+        if sum(caps) < n_students:
+            violations.append({
+                "rule": "capacity",
+                "id_module": mid,
+                "message": f"Room {item['salle']} capacity insufficient for module {item['module']} "
+                           f"(students={n_students}, seats={sum(caps)})",
+            })
+
+    # 2) one exam per student per creneau, over every inscription at once
+    creneau_of = {item["id_module"]: item["id_creneau"] for item in placed}
+    for cid, (n_students, mids) in _double_booked(enrollment, creneau_of).items():
+        violations.append({
+            "rule": "student_clash",
+            "id_creneau": cid,
+            "modules": mids,
+            "message": f"Student clash: {n_students} student(s) have more than one exam in creneau "
+                       f"{cid} (modules {', '.join(map(str, mids))})",
+        })
+
+    # 3) one exam per student per day
+    day_of_module = {mid: day_of[cid] for mid, cid in creneau_of.items()}
+    for day, (n_students, mids) in _double_booked(enrollment, day_of_module).items():
+        violations.append({
+            "rule": "student_day",
+            "date": day,
+            "modules": mids,
+            "message": f"Student conflict: {n_students} student(s) have more than one exam "
+                       f"on {day} (modules {', '.join(map(str, mids))})",
+        })
+
+    # 4) professor limit per day
+    module_prof = problem.get("module_prof", {})
+    prof_day = Counter(
+        (module_prof[item["id_module"]], day_of[item["id_creneau"]])
+        for item in placed if item["id_module"] in module_prof
+    )
+    for (pid, day), n in sorted(prof_day.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        if n > max_per_day:
+            violations.append({
+                "rule": "professor_day",
+                "id_prof": pid,
+                "date": day,
+                "message": f"Professor {pid} would have {n} exams on {day} (max {max_per_day})",
+            })
+
+    return violations
+